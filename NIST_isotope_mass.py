@@ -1,43 +1,163 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+from numpy.typing import ArrayLike, NDArray
+
+relative_atomic_mass_to_keV: float = 1.11779292e7 / 12.
+
+isotope_dtype: np.dtype = np.dtype([
+    ("Z", np.int16),
+    ("A", np.int16),
+    ("symbol", "U3"),
+    ("mass", np.float64),                   # keV
+    ("mass_uncertainty", np.float64),       # keV
+    ("abundance", np.float64),              # 0 if not naturally occurring
+    ("abundance_uncertainty", np.float64),
+])
+
+def _parse_value(value_string: str) -> tuple[float, float]:
+    # "1.00782503223(9)" -> (1.00782503223, 9e-11), a trailing "#" marks an estimated value
+    value_string = value_string.replace("#", "")
+    uncertainty_start = value_string.find("(")
+    if uncertainty_start == -1:
+        return (float(value_string), 0.)
+
+    mantissa: str = value_string[:uncertainty_start]
+    uncertainty_digits: str = value_string[uncertainty_start + 1:value_string.find(")")]
+    decimals: int = len(mantissa) - mantissa.find(".") - 1 if "." in mantissa else 0
+
+    return (float(mantissa), float(uncertainty_digits) * 10.**(-decimals))
+
+def parse_isotope_table(filename: str) -> NDArray:
+    rows: list[tuple] = []
+    with open(filename) as f:
+        at_data = False
+
+        symbol = ""
+        Z = 0
+
+        for l in f:
+            if l.isspace() or l == "":
+                continue
+
+            if not at_data and "_" not in l:
+                continue
+            elif not at_data and "_" in l:
+                at_data = True
+                continue
+            elif at_data and "_" in l:
+                continue
+
+            if not l[0:3].isspace():
+                symbol = l[4:6].replace(" ", "")
+                Z = int(l[0:3])
+
+            A = int(l[8:11])
+            mass, mass_uncertainty = _parse_value(l[13:32].strip())
+
+            abundance_string: str = l[32:46].strip()
+            abundance, abundance_uncertainty = _parse_value(abundance_string) if abundance_string else (0., 0.)
+
+            rows.append((Z, A, symbol, mass * relative_atomic_mass_to_keV, mass_uncertainty * relative_atomic_mass_to_keV, abundance, abundance_uncertainty))
+
+    return np.array(rows, dtype=isotope_dtype)
+
+def _file_digest(filename: str) -> str:
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_isotope_table(filename: str, use_cache: bool = True) -> NDArray:
+    if not use_cache:
+        return parse_isotope_table(filename)
+
+    # The cache sits next to the text file and carries the text file's hash in its name,
+    # so editing the text file makes the old cache unreachable and it is rebuilt
+    stem: str = os.path.splitext(filename)[0]
+    cache_filename: str = f"{stem}.{_file_digest(filename)[:16]}.npy"
+
+    if os.path.exists(cache_filename):
+        try:
+            return np.load(cache_filename, mmap_mode="r")
+        except (OSError, ValueError):
+            pass
+
+    isotopes: NDArray = parse_isotope_table(filename)
+
+    try:
+        for stale in glob.glob(f"{glob.escape(stem)}.*.npy"):
+            os.remove(stale)
+        tmp_filename: str = f"{cache_filename}.{os.getpid()}.tmp"
+        with open(tmp_filename, "wb") as f:
+            np.save(f, isotopes)
+        os.replace(tmp_filename, cache_filename)
+    except OSError:
+        pass
+
+    return isotopes
+
 class NIST_isotope_mass:
-    def __init__(self, filename):
-        self._isotope_dict = {}
-        with open(filename) as f:
-            at_data = False
-
-            symbol = ""
-
-            relative_atomic_mass_to_keV: float = 1.11779292e7 / 12.
-
-            for l in f:
-                if l.isspace() or l == "":
-                    continue
-
-                if not at_data and "_" not in l:
-                    continue
-                elif not at_data and "_" in l:
-                    at_data = True
-                    continue
-                elif at_data and "_" in l:
-                    continue
-
-                if not l[0:3].isspace():
-                    symbol = l[4:6].replace(" ", "")
-                    self._isotope_dict[symbol] = {"Z": int(l[0:3]), "isotopes mass": {}}
-                
-                A = int(l[8:11])
-                mass_string_end = l.find("(")
-                mass = float(l[13:mass_string_end])
-                mass = mass * relative_atomic_mass_to_keV
-
-                self._isotope_dict[symbol]["isotopes mass"][A] = mass
-    
+    def __init__(self, filename: str, use_cache: bool = True):
+        self._isotopes: NDArray = load_isotope_table(filename, use_cache)
+
+        first_rows: NDArray[np.intp] = np.unique(self._isotopes["Z"], return_index=True)[1]
+        self._Z_dict: dict[str, int] = dict(zip(self._isotopes["symbol"][first_rows].tolist(), self._isotopes["Z"][first_rows].tolist()))
+        self._symbols: NDArray = np.full(self._isotopes["Z"].max() + 1, "", dtype="U3")
+        self._symbols[self._isotopes["Z"][first_rows]] = self._isotopes["symbol"][first_rows]
+
+        # Dense (Z, A) table so bulk lookups are a single fancy-indexing operation
+        self._mass_table: NDArray[np.float64] = np.full((self._isotopes["Z"].max() + 1, self._isotopes["A"].max() + 1), np.nan)
+        self._mass_table[self._isotopes["Z"], self._isotopes["A"]] = self._isotopes["mass"]
+        self._mass_uncertainty_table: NDArray[np.float64] = np.full(self._mass_table.shape, np.nan)
+        self._mass_uncertainty_table[self._isotopes["Z"], self._isotopes["A"]] = self._isotopes["mass_uncertainty"]
+        self._abundance_table: NDArray[np.float64] = np.full(self._mass_table.shape, np.nan)
+        self._abundance_table[self._isotopes["Z"], self._isotopes["A"]] = self._isotopes["abundance"]
+
     def get_isotope_mass(self, symbol: str, A: int) -> float:
-        return self._isotope_dict[symbol]["isotopes mass"][A]
-    
-    def get_Z(self, symbol: str) -> int:
-        return self._isotope_dict[symbol]["Z"]
+        Z: int = self.get_Z(symbol)
+        if A >= self._mass_table.shape[1] or np.isnan(self._mass_table[Z, A]):
+            raise KeyError(A)
+        return float(self._mass_table[Z, A])
 
+    def get_isotope_mass_uncertainty(self, symbol: str, A: int) -> float:
+        Z: int = self.get_Z(symbol)
+        if A >= self._mass_uncertainty_table.shape[1] or np.isnan(self._mass_uncertainty_table[Z, A]):
+            raise KeyError(A)
+        return float(self._mass_uncertainty_table[Z, A])
 
+    def get_isotope_abundance(self, symbol: str, A: int) -> float:
+        # Natural isotopic composition as a fraction, 0 for isotopes that do not occur naturally
+        Z: int = self.get_Z(symbol)
+        if A >= self._abundance_table.shape[1] or np.isnan(self._abundance_table[Z, A]):
+            raise KeyError(A)
+        return float(self._abundance_table[Z, A])
 
+    def get_isotope_masses(self, symbols: ArrayLike, As: ArrayLike) -> NDArray[np.float64]:
+        unique_symbols, inverse = np.unique(np.asarray(symbols), return_inverse=True)
+        Zs: NDArray[np.intp] = np.array([self.get_Z(str(s)) for s in unique_symbols], dtype=np.intp)[inverse]
+        return self.get_isotope_masses_Z(Zs.reshape(np.shape(symbols)), As)
+
+    def get_isotope_masses_Z(self, Zs: ArrayLike, As: ArrayLike) -> NDArray[np.float64]:
+        Zs, As = np.broadcast_arrays(np.asarray(Zs, dtype=np.intp), np.asarray(As, dtype=np.intp))
+        in_table: NDArray[np.bool_] = (Zs >= 0) & (Zs < self._mass_table.shape[0]) & (As >= 0) & (As < self._mass_table.shape[1])
+        masses: NDArray[np.float64] = np.full(Zs.shape, np.nan)
+        masses[in_table] = self._mass_table[Zs[in_table], As[in_table]]
+        return masses
+
+    def get_isotope_mass_uncertainties_Z(self, Zs: ArrayLike, As: ArrayLike) -> NDArray[np.float64]:
+        Zs, As = np.broadcast_arrays(np.asarray(Zs, dtype=np.intp), np.asarray(As, dtype=np.intp))
+        in_table: NDArray[np.bool_] = (Zs >= 0) & (Zs < self._mass_table.shape[0]) & (As >= 0) & (As < self._mass_table.shape[1])
+        uncertainties: NDArray[np.float64] = np.full(Zs.shape, np.nan)
+        uncertainties[in_table] = self._mass_uncertainty_table[Zs[in_table], As[in_table]]
+        return uncertainties
+
+    def get_Z(self, symbol: str) -> int:
+        return self._Z_dict[symbol]
 
+    def get_symbols(self, Zs: ArrayLike) -> NDArray:
+        return self._symbols[np.asarray(Zs, dtype=np.intp)]
 
+    def get_isotope_table(self) -> NDArray:
+        return self._isotopes
@@ -0,0 +1,55 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import EjectKinematics, branch_jacobians, eject_kinematics
+from reactions import Reaction
+
+from numpy.typing import ArrayLike, NDArray
+
+class AngularSpectra(NamedTuple):
+    reaction: Reaction
+    beam_energy: NDArray[np.float64]
+    angle_edges: NDArray[np.float64] # lab angle [deg]
+    bin_edges: NDArray[np.float64]   # ejectile lab energy [keV]
+    spectra: NDArray[np.float64]     # (level, beam energy, bin), fraction of reactions per bin inside the angle range
+    maps: NDArray[np.float64]        # (level, angle, bin), beam-weighted fraction of reactions per cell
+
+def angular_spectra(masses: NIST_isotope_mass, reaction: Reaction, beam_energy: ArrayLike, angle_edges: ArrayLike, bin_edges: NDArray[np.float64],
+                    legendre: tuple[float, ...] = (1.,), beam_weights: ArrayLike | None = None) -> AngularSpectra:
+    # The CM angular distribution is W(theta_CM) = sum_l legendre[l] P_l(cos theta_CM), normalised so that
+    # legendre = (1.,) is isotropic with unit total. Every lab angle cell contributes
+    # W / (4 pi) * dOmega_CM / dOmega_lab * dOmega_lab at the ejectile energy of its centre, for both branches.
+    beam_energy = np.atleast_1d(np.asarray(beam_energy, dtype=np.float64))
+    angle_edges = np.asarray(angle_edges, dtype=np.float64)
+    beam_weights = np.full(beam_energy.shape, 1. / beam_energy.size) if beam_weights is None else np.asarray(beam_weights, dtype=np.float64)
+
+    angles: NDArray[np.float64] = 0.5 * (angle_edges[:-1] + angle_edges[1:])
+    solid_angle: NDArray[np.float64] = 2. * np.pi * np.abs(np.cos(np.deg2rad(angle_edges[:-1])) - np.cos(np.deg2rad(angle_edges[1:])))
+
+    # (level, angle, beam energy)
+    levels: NDArray[np.float64] = np.asarray(reaction.levels, dtype=np.float64).reshape(-1, 1, 1)
+    lab_energy: NDArray[np.float64] = beam_energy.reshape(1, 1, -1)
+    lab_angle: NDArray[np.float64] = angles.reshape(1, -1, 1)
+    proj_mass, target_mass, eject_mass, recoil_mass = reaction.masses(masses)
+
+    kinematics: EjectKinematics = eject_kinematics(lab_energy, lab_angle, proj_mass, target_mass, eject_mass, recoil_mass, levels)
+    shape: tuple[int, ...] = kinematics.plus.shape
+    n_bins: int = bin_edges.size - 1
+
+    spectra: NDArray[np.float64] = np.zeros(shape[0] * shape[2] * n_bins)
+    maps: NDArray[np.float64] = np.zeros(shape[0] * shape[1] * n_bins)
+    level_index, angle_index, beam_index = np.indices(shape)
+
+    for branch in branch_jacobians(kinematics, lab_energy, lab_angle, proj_mass, eject_mass, recoil_mass):
+        weights: NDArray[np.float64] = np.polynomial.legendre.legval(branch.cos_cm, legendre) / (4. * np.pi) * branch.jacobian * solid_angle.reshape(1, -1, 1)
+        bins: NDArray[np.intp] = np.searchsorted(bin_edges, np.where(branch.valid, branch.energy, -np.inf), side="right") - 1
+        inside: NDArray[np.bool_] = branch.valid & (bins >= 0) & (bins < n_bins)
+
+        spectra += np.bincount(((level_index * shape[2] + beam_index) * n_bins + bins)[inside], weights=weights[inside], minlength=spectra.size)
+        maps += np.bincount(((level_index * shape[1] + angle_index) * n_bins + bins)[inside],
+                            weights=(weights * beam_weights.reshape(1, 1, -1))[inside], minlength=maps.size)
+
+    return AngularSpectra(reaction, beam_energy, angle_edges, bin_edges,
+                          spectra.reshape(shape[0], shape[2], n_bins), maps.reshape(shape[0], shape[1], n_bins))
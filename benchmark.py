@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import Any, Callable
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import eject_lab_energy, gamma_energy, has_enough_energy
+from reactions import Reaction, ReactionGraph
+
+from numpy.typing import NDArray
+
+mass_filename: str = "data/nist_isotope_mass.txt"
+grid_sizes: tuple[int, ...] = (10**3, 10**4, 10**5, 10**6, 10**7)
+# The chained case evaluates 4 levels x 3 angles per energy and needs about 0.7 GiB at 10^6 energies
+max_chained_size: int = 10**6
+
+def time_case(func: Callable[[], Any], repeats: int, min_time: float) -> list[float]:
+    # At least `repeats` runs, more for fast cases until min_time has been spent
+    timings: list[float] = []
+    start: float = time.perf_counter()
+    while len(timings) < repeats or (time.perf_counter() - start < min_time and len(timings) < 1000):
+        t0: float = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+def benchmark_cases(masses: NIST_isotope_mass, sizes: tuple[int, ...], usetex: bool) -> list[tuple[str, int, Callable[[], Any]]]:
+    source: Reaction = Reaction("13C", "a", "n", "16O", (0., 6130., 6917., 7117.))
+    detector: Reaction = Reaction("79Br", "n", "p", "79Se")
+    He4_mass, C13_mass, neutron_mass, O16_mass = source.masses(masses)
+    O16_gamma_masses: tuple[float, ...] = Reaction("12C", "a", "g", "16O").masses(masses)
+
+    cases: list[tuple[str, int, Callable[[], Any]]] = [
+        ("nist_isotope_mass_text", 0, lambda: NIST_isotope_mass(mass_filename, use_cache=False)),
+        ("nist_isotope_mass_cached", 0, lambda: NIST_isotope_mass(mass_filename)),
+    ]
+
+    for size in sizes:
+        lab_energy: NDArray[np.float64] = np.linspace(4e3, 9e3, size)
+        cases += [
+            ("eject_lab_energy", size, lambda lab_energy=lab_energy: eject_lab_energy(lab_energy, 45, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)),
+            ("gamma_energy", size, lambda lab_energy=lab_energy: gamma_energy(lab_energy, O16_gamma_masses[0], O16_gamma_masses[1], O16_gamma_masses[3], 6130)),
+            ("has_enough_energy", size, lambda lab_energy=lab_energy: has_enough_energy(lab_energy, 45, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)),
+        ]
+        if size <= max_chained_size:
+            cases.append(("chained_two_stage", size, lambda lab_energy=lab_energy: chained_two_stage(masses, lab_energy, source, detector)))
+
+    cases.append(("render_figure", 1000, lambda: render_single_figure(usetex)))
+    return cases
+
+def chained_two_stage(masses: NIST_isotope_mass, lab_energy: NDArray[np.float64], source: Reaction, detector: Reaction) -> None:
+    graph: ReactionGraph = ReactionGraph(masses, lab_energy)
+    graph.add_stage("source", source, (45., 90., 135.))
+    graph.add_stage("detector", detector, (0.,), source="source")
+    graph.evaluate("detector")
+
+def render_single_figure(usetex: bool) -> None:
+    from rendering import CurveSpec, FigureSpec, default_style, render_figures
+
+    style: dict[str, dict] = dict(default_style, text={"usetex": usetex})
+    x: NDArray[np.float64] = np.linspace(4e3, 9e3, 1000)
+    with tempfile.TemporaryDirectory() as directory:
+        spec: FigureSpec = FigureSpec(os.path.join(directory, "benchmark.png"), "benchmark", "$E_{\\alpha}$ [keV]", "$E_{n}$ [keV]",
+                                      [CurveSpec(x, x * (0.5 + 0.1 * i), label=f"curve {i}") for i in range(4)])
+        render_figures([spec], style, processes=1)
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes: tuple[int, ...], repeats: int, min_time: float, usetex: bool, only: list[str] | None) -> dict[str, Any]:
+    masses: NIST_isotope_mass = NIST_isotope_mass(mass_filename)
+    results: list[dict[str, Any]] = []
+
+    for name, size, func in benchmark_cases(masses, sizes, usetex):
+        if only is not None and name not in only:
+            continue
+
+        timings: list[float] = time_case(func, repeats, min_time)
+        results.append({
+            "name": name,
+            "size": size,
+            "runs": len(timings),
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+        })
+        print(f"{name:<26} {size:>9} {results[-1]['median'] * 1e3:12.4f} ms", file=sys.stderr)
+
+    return {
+        "metadata": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    # Compares medians of cases present in both runs, a case is a regression if it got slower by more than threshold
+    baseline_results: dict[tuple[str, int], float] = {(r["name"], r["size"]): r["median"] for r in baseline["results"]}
+    regressions: list[str] = []
+    for result in current["results"]:
+        key: tuple[str, int] = (result["name"], result["size"])
+        if key not in baseline_results:
+            continue
+        ratio: float = result["median"] / baseline_results[key]
+        if ratio > threshold:
+            regressions.append(f"{result['name']} (size {result['size']}): {ratio:.2f}x slower than baseline")
+    return regressions
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Time the mass table, kinematics kernels, chained evaluation and figure rendering")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file the results are written to")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(grid_sizes), help="energy grid sizes")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum time spent per case [s]")
+    parser.add_argument("--only", nargs="*", help="names of the cases to run")
+    parser.add_argument("--no-usetex", action="store_true", help="render without LaTeX")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown factor counted as a regression")
+    args: argparse.Namespace = parser.parse_args()
+
+    current: dict[str, Any] = run_benchmarks(tuple(args.sizes), args.repeats, args.min_time, not args.no_usetex, args.only)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            regressions: list[str] = compare(json.load(f), current, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,109 @@
+import dataclasses
+import hashlib
+import json
+import os
+import time
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+
+from reactions import Reaction, ReactionGraph, Stage
+
+def _update_hash(h: Any, value: Any) -> None:
+    h.update(type(value).__name__.encode())
+    if isinstance(value, np.ndarray):
+        h.update(f"{value.dtype.str}{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"[{len(value)}".encode())
+        for item in value:
+            _update_hash(h, item)
+    elif isinstance(value, dict):
+        h.update(f"{{{len(value)}".encode())
+        for key in sorted(value, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, value[key])
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for f in dataclasses.fields(value):
+            _update_hash(h, f.name)
+            _update_hash(h, getattr(value, f.name))
+    else:
+        h.update(repr(value).encode())
+
+def hash_inputs(*inputs: Any) -> str:
+    h = hashlib.sha256()
+    for value in inputs:
+        _update_hash(h, value)
+    return h.hexdigest()
+
+def stage_key(graph: ReactionGraph, name: str) -> str:
+    # Covers everything a stage result depends on: reaction, masses and their uncertainties, levels, angles, branch and upstream stages
+    stage: Stage = graph.stages[name]
+    upstream: str = stage_key(graph, stage.source) if stage.source is not None else hash_inputs(graph.beam_energy)
+    return hash_inputs(stage.reaction, stage.reaction.masses(graph.masses), stage.reaction.mass_uncertainties(graph.masses), stage.angles, stage.branch, upstream)
+
+def curve_key(graph: ReactionGraph, name: str, index: tuple[int, ...]) -> str:
+    # Like stage_key, for the single curve at index = (level, angle) + upstream index: only its own level and
+    # angle and the upstream curve feeding it count. The beam end is keyed on the energy window instead of the
+    # grid points, as the shared adaptive grid is refined around the thresholds and bends of every curve.
+    stage: Stage = graph.stages[name]
+    reaction: Reaction = dataclasses.replace(stage.reaction, levels=(stage.reaction.levels[index[0]],))
+    upstream: str = curve_key(graph, stage.source, index[2:]) if stage.source is not None else hash_inputs(float(graph.beam_energy[0]), float(graph.beam_energy[-1]))
+    return hash_inputs(reaction, reaction.masses(graph.masses), reaction.mass_uncertainties(graph.masses), stage.angles[index[1]], stage.branch, upstream)
+
+@dataclass
+class BuildJob:
+    output: str
+    key: str
+    build: Callable[[], Any]
+
+class BuildCache:
+    def __init__(self, manifest_filename: str):
+        self._manifest_filename: str = manifest_filename
+        self._outputs: dict[str, str] = {}
+        self._regenerated: dict[str, str] = {}
+
+        if os.path.exists(manifest_filename):
+            try:
+                with open(manifest_filename) as f:
+                    self._outputs = json.load(f).get("outputs", {})
+            except (OSError, ValueError):
+                self._outputs = {}
+
+    def stale_reason(self, output: str, key: str) -> str | None:
+        if output not in self._outputs:
+            return "new output"
+        if not os.path.exists(output):
+            return "output file missing"
+        if self._outputs[output] != key:
+            return "inputs changed"
+        return None
+
+    def stale_jobs(self, jobs: list[BuildJob]) -> list[tuple[BuildJob, str]]:
+        result: list[tuple[BuildJob, str]] = []
+        for job in jobs:
+            reason: str | None = self.stale_reason(job.output, job.key)
+            if reason is not None:
+                result.append((job, reason))
+        return result
+
+    def record(self, output: str, key: str, reason: str) -> None:
+        self._outputs[output] = key
+        self._regenerated[output] = reason
+
+    def save(self) -> None:
+        directory: str = os.path.dirname(self._manifest_filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        manifest: dict[str, Any] = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "outputs": self._outputs,
+            "regenerated": self._regenerated,
+        }
+        tmp_filename: str = f"{self._manifest_filename}.tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_filename, self._manifest_filename)
@@ -0,0 +1,217 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import time
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from reactions import Reaction, ReactionGraph, parse_nuclide
+from build_cache import hash_inputs
+from curve_store import export_curves
+from intensities import CrossSectionLibrary, graph_weights
+from main import O16_levels, build_energy_grid, build_reaction_graph
+
+from numpy.typing import NDArray
+
+# (alpha,n) sources by target, with the recoil levels fed strongly enough to give separate neutron groups [keV]
+source_levels: dict[str, tuple[float, ...]] = {
+    "9Be": (0., 4438.9, 7654.1),   # 12C
+    "13C": O16_levels,             # 16O
+    "18O": (0., 350.7, 1746.0),    # 21Ne
+}
+
+# Ejectiles of the neutron-induced detector channels, as (name, Z, A removed from the compound system)
+detector_ejectiles: dict[str, tuple[int, int]] = {
+    "p": (1, 1),
+    "a": (2, 4),
+}
+
+@dataclass(frozen=True)
+class CampaignPoint:
+    energy_window: tuple[float, float] # alpha energy [keV]
+    angles: tuple[float, ...]          # neutron lab angles [deg]
+    source: Reaction
+    detectors: tuple[Reaction, ...]    # every channel of one detector isotope
+    tolerance: float = 1.              # keV, of the adaptive energy grid
+
+    @property
+    def label(self) -> str:
+        angles: str = ",".join(f"{angle:g}" for angle in self.angles)
+        return f"{self.source.name} {self.energy_window[0]:g}-{self.energy_window[1]:g} keV, {angles} deg, {self.detectors[0].target}"
+
+def source_reaction(masses: NIST_isotope_mass, target: str, levels: dict[str, tuple[float, ...]] = source_levels) -> Reaction:
+    if target not in levels:
+        raise ValueError(f"No recoil levels for the source '{target}', known sources are {', '.join(levels)}")
+    symbol, A = parse_nuclide(target)
+    return Reaction.from_string(f"{target}(a,n){A + 3}{str(masses.get_symbols(masses.get_Z(symbol) + 2))}", levels[target])
+
+def detector_channels(masses: NIST_isotope_mass, target: str, ejectiles: tuple[str, ...] = tuple(detector_ejectiles)) -> tuple[Reaction, ...]:
+    symbol, A = parse_nuclide(target)
+    Z: int = masses.get_Z(symbol)
+    channels: list[Reaction] = []
+    for ejectile in ejectiles:
+        if ejectile not in detector_ejectiles:
+            raise ValueError(f"Unknown detector ejectile '{ejectile}', expected one of {', '.join(detector_ejectiles)}")
+        ejectile_Z, ejectile_A = detector_ejectiles[ejectile]
+        recoil: str = f"{A + 1 - ejectile_A}{str(masses.get_symbols(Z - ejectile_Z))}"
+        channels.append(Reaction.from_string(f"{target}(n,{ejectile}){recoil}"))
+    return tuple(channels)
+
+def campaign_points(masses: NIST_isotope_mass, spec: dict) -> list[CampaignPoint]:
+    # The Cartesian product of the sweep dimensions of the spec, in spec order
+    levels: dict[str, tuple[float, ...]] = source_levels | {target: tuple(value) for target, value in spec.get("source_levels", {}).items()}
+    ejectiles: tuple[str, ...] = tuple(spec.get("detector_channels", detector_ejectiles))
+    tolerance: float = float(spec.get("tolerance", 1.))
+
+    windows: list[tuple[float, float]] = [(float(low), float(high)) for low, high in spec["energy_windows"]]
+    for low, high in windows:
+        if not 0 < low < high:
+            raise ValueError(f"Energy window {low:g}-{high:g} keV is empty")
+    angle_sets: list[tuple[float, ...]] = [tuple(float(angle) for angle in angles) for angles in spec["angle_sets"]]
+    sources: list[Reaction] = [source_reaction(masses, target, levels) for target in spec["sources"]]
+    detectors: list[tuple[Reaction, ...]] = [detector_channels(masses, target, ejectiles) for target in spec["detectors"]]
+
+    return [CampaignPoint(window, angles, source, channels, tolerance)
+            for window, angles, source, channels in itertools.product(windows, angle_sets, sources, detectors)]
+
+def point_key(masses: NIST_isotope_mass, point: CampaignPoint, cross_sections: CrossSectionLibrary | None = None) -> str:
+    # Covers the point, the masses it uses and the cross-section tables its weights are read from, like
+    # stage_key and weights_key, so a changed mass table or an edited table file gives new keys
+    reactions: tuple[Reaction, ...] = (point.source,) + point.detectors
+    tables: list | None = None if cross_sections is None else [cross_sections.tables(reaction) for reaction in reactions]
+    return hash_inputs(point, [reaction.masses(masses) for reaction in reactions], cross_sections is not None, tables)[:24]
+
+class CampaignStore:
+    # One directory, one curve store per point, named by its key: {key}.npz with the curves (see curve_store)
+    # and {key}.json with the point. The json is written first and the npz moved into place last, so a point
+    # counts as done exactly when its npz exists; an interrupted write leaves only a .tmp file behind.
+    def __init__(self, directory: str):
+        self._directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def curves_filename(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.npz")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.curves_filename(key))
+
+    def keys(self) -> list[str]:
+        # Only finished points, "<key>.npz" with nothing between the key and the extension
+        names: list[str] = [os.path.basename(filename) for filename in glob.glob(os.path.join(glob.escape(self._directory), "*.npz"))]
+        return sorted(name[:-4] for name in names if "." not in name[:-4])
+
+    def point(self, key: str) -> dict:
+        with open(os.path.join(self._directory, f"{key}.json")) as f:
+            return json.load(f)
+
+    def remove_partial(self) -> int:
+        partial: list[str] = glob.glob(os.path.join(glob.escape(self._directory), "*.tmp"))
+        for filename in partial:
+            os.remove(filename)
+        return len(partial)
+
+    def write(self, key: str, point: CampaignPoint, graph: ReactionGraph, weights: dict[str, NDArray[np.float64]] | None, seconds: float) -> None:
+        record: dict = {"key": key, "label": point.label, "point": asdict(point), "points": int(graph.beam_energy.size), "seconds": seconds}
+        tmp_suffix: str = f".{os.getpid()}.tmp"
+        with open(os.path.join(self._directory, f"{key}.json{tmp_suffix}"), "w") as f:
+            json.dump(record, f, indent=1)
+        os.replace(os.path.join(self._directory, f"{key}.json{tmp_suffix}"), os.path.join(self._directory, f"{key}.json"))
+
+        # Written through an open file, np.savez would append ".npz" to a file name
+        tmp_filename: str = self.curves_filename(key) + tmp_suffix
+        with open(tmp_filename, "wb") as f:
+            export_curves(graph, f, weights)
+        os.replace(tmp_filename, self.curves_filename(key))
+
+_worker_masses: NIST_isotope_mass | None = None
+
+def _setup_worker(masses_filename: str) -> None:
+    # Called once per process, the mass table is read from its binary cache
+    global _worker_masses
+    _worker_masses = NIST_isotope_mass(masses_filename)
+
+def run_point(directory: str, key: str, point: CampaignPoint, cross_sections: str | None) -> tuple[str, float]:
+    start: float = time.perf_counter()
+    setup: dict = {"sources": (point.source,), "detectors": point.detectors, "gammas": (), "angles": point.angles}
+
+    lab_energy: NDArray[np.float64] = build_energy_grid(_worker_masses, *point.energy_window, point.tolerance, **setup)
+    graph: ReactionGraph = build_reaction_graph(_worker_masses, lab_energy, **setup)
+    weights: dict[str, NDArray[np.float64]] | None = graph_weights(graph, CrossSectionLibrary(cross_sections)) if cross_sections is not None else None
+
+    seconds: float = time.perf_counter() - start
+    CampaignStore(directory).write(key, point, graph, weights, seconds)
+    return (key, seconds)
+
+def run_campaign(spec: dict, directory: str, masses_filename: str = "data/nist_isotope_mass.txt", processes: int | None = None) -> tuple[int, int, list[str]]:
+    # Returns the number of points computed now, those found already done, and the labels of failed points.
+    # Failed points are not stored, so they are tried again when the campaign is resumed.
+    masses: NIST_isotope_mass = NIST_isotope_mass(masses_filename)
+    store: CampaignStore = CampaignStore(directory)
+    cross_sections: str | None = spec.get("cross_sections")
+
+    points: list[CampaignPoint] = campaign_points(masses, spec)
+    library: CrossSectionLibrary | None = CrossSectionLibrary(cross_sections) if cross_sections is not None else None
+    keyed: dict[str, CampaignPoint] = {point_key(masses, point, library): point for point in points}
+    pending: dict[str, CampaignPoint] = {key: point for key, point in keyed.items() if key not in store}
+    store.remove_partial()
+    print(f"{len(keyed)} points, {len(keyed) - len(pending)} already in {directory}, {len(pending)} to run")
+    if not pending:
+        return (0, len(keyed), [])
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(pending))
+
+    failed: list[str] = []
+    done: int = 0
+    with ProcessPoolExecutor(max_workers=processes, initializer=_setup_worker, initargs=(masses_filename,)) as executor:
+        futures: dict[Future, str] = {executor.submit(run_point, directory, key, point, cross_sections): key for key, point in pending.items()}
+        try:
+            for future in as_completed(futures):
+                point: CampaignPoint = pending[futures[future]]
+                try:
+                    key, seconds = future.result()
+                except (ValueError, KeyError) as error:
+                    failed.append(point.label)
+                    print(f"Failed {point.label}: {error!r}")
+                    continue
+                done += 1
+                print(f"[{done + len(failed)}/{len(pending)}] {key} {point.label} ({seconds:.2f} s)")
+        except KeyboardInterrupt:
+            # Finished points are already stored, the rest is picked up when the campaign is run again
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+    return (done, len(keyed) - len(pending), failed)
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Run the kinematics for every combination of a parameter sweep, resuming where a previous run stopped")
+    parser.add_argument("spec", help="JSON sweep spec with energy_windows, angle_sets, sources and detectors, "
+                                     "e.g. {\"energy_windows\": [[4e3, 9e3]], \"angle_sets\": [[45, 90, 135]], \"sources\": [\"9Be\", \"13C\", \"18O\"], \"detectors\": [\"79Br\", \"81Br\"]}")
+    parser.add_argument("--output", default="campaign", help="result directory, one curve store per point")
+    parser.add_argument("--processes", type=int, help="worker processes, all cores by default")
+    parser.add_argument("--masses", default="data/nist_isotope_mass.txt")
+    args: argparse.Namespace = parser.parse_args()
+
+    with open(args.spec) as f:
+        spec: dict = json.load(f)
+
+    try:
+        done, skipped, failed = run_campaign(spec, args.output, args.masses, args.processes)
+    except (ValueError, KeyError) as error:
+        raise SystemExit(f"error: {error}")
+    except KeyboardInterrupt:
+        raise SystemExit(f"Interrupted, finished points are kept in {args.output} and skipped when the campaign is run again")
+    print(f"Computed {done} points, skipped {skipped} finished ones" + (f", {len(failed)} failed" if failed else ""))
+    if failed:
+        raise SystemExit(1)
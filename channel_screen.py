@@ -0,0 +1,87 @@
+import argparse
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import kinematic_thresholds
+from reactions import neutron_mass
+
+from numpy.typing import NDArray
+
+# Neutron-induced channels as (name, ejectile Z, ejectile A removed from the compound system)
+neutron_channels: tuple[tuple[str, int, int], ...] = (
+    ("n,p", 1, 1),
+    ("n,d", 1, 2),
+    ("n,t", 1, 3),
+    ("n,3He", 2, 3),
+    ("n,a", 2, 4),
+    ("n,2n", 0, 2),
+    ("n,g", 0, 0),
+)
+
+channel_dtype: np.dtype = np.dtype([
+    ("target", "U8"),
+    ("channel", "U8"),
+    ("residual", "U8"),
+    ("abundance", np.float64),
+    ("q_value", np.float64),   # keV
+    ("threshold", np.float64), # lab neutron energy [keV]
+    ("open_at_min", np.bool_), # already open at the lower end of the energy range, i.e. over the whole range
+])
+
+def screen_channels(masses: NIST_isotope_mass, energy_range: tuple[float, float], elements: list[str] | None = None) -> NDArray:
+    if not 0 <= energy_range[0] <= energy_range[1]:
+        raise ValueError(f"Energy range {energy_range[0]:g}-{energy_range[1]:g} keV is empty")
+    isotopes: NDArray = masses.get_isotope_table()
+    stable: NDArray[np.bool_] = isotopes["abundance"] > 0
+    if elements is not None:
+        stable &= np.isin(isotopes["Z"], [masses.get_Z(element) for element in elements])
+
+    target_Z: NDArray[np.intp] = isotopes["Z"][stable].astype(np.intp)[:, np.newaxis]
+    target_A: NDArray[np.intp] = isotopes["A"][stable].astype(np.intp)[:, np.newaxis]
+    target_mass: NDArray[np.float64] = isotopes["mass"][stable][:, np.newaxis]
+    abundance: NDArray[np.float64] = isotopes["abundance"][stable][:, np.newaxis]
+
+    # (target, channel) grids
+    ejectile_Z: NDArray[np.intp] = np.array([channel[1] for channel in neutron_channels])[np.newaxis, :]
+    ejectile_A: NDArray[np.intp] = np.array([channel[2] for channel in neutron_channels])[np.newaxis, :]
+    ejectile_mass: NDArray[np.float64] = np.where(ejectile_Z > 0, masses.get_isotope_masses_Z(np.maximum(ejectile_Z, 1), np.maximum(ejectile_A, 1)), ejectile_A * neutron_mass)
+
+    residual_Z: NDArray[np.intp] = target_Z - ejectile_Z
+    residual_A: NDArray[np.intp] = target_A + 1 - ejectile_A
+    residual_mass: NDArray[np.float64] = masses.get_isotope_masses_Z(residual_Z, residual_A)
+
+    q_value: NDArray[np.float64] = neutron_mass + target_mass - ejectile_mass - residual_mass
+    # (n,2n) is treated as a two-body emission of a 2n system, which gives the three-body threshold
+    threshold: NDArray[np.float64] = kinematic_thresholds(0., neutron_mass, target_mass, ejectile_mass, residual_mass, 0.).lower
+
+    # A channel is open somewhere in the range as soon as its threshold lies below the upper end
+    is_open: NDArray[np.bool_] = ~np.isnan(q_value) & (threshold <= energy_range[1])
+    target_index, channel_index = np.nonzero(is_open)
+
+    table: NDArray = np.zeros(target_index.size, dtype=channel_dtype)
+    table["target"] = np.char.add(target_A[target_index, 0].astype("U3"), masses.get_symbols(target_Z[target_index, 0]))
+    table["channel"] = np.array([channel[0] for channel in neutron_channels])[channel_index]
+    table["residual"] = np.char.add(residual_A[target_index, channel_index].astype("U3"), masses.get_symbols(residual_Z[target_index, channel_index]))
+    table["abundance"] = abundance[target_index, 0]
+    table["q_value"] = q_value[target_index, channel_index]
+    table["threshold"] = threshold[target_index, channel_index]
+    table["open_at_min"] = table["threshold"] <= energy_range[0]
+
+    return table[np.lexsort((-table["q_value"], table["threshold"]))]
+
+def format_channel_table(table: NDArray) -> str:
+    lines: list[str] = [f"{'reaction':<24} {'abundance':>9} {'Q-value [keV]':>14} {'threshold [keV]':>16} {'open at MIN':>11}"]
+    for row in table:
+        reaction: str = f"{row['target']}({row['channel']}){row['residual']}"
+        lines.append(f"{reaction:<24} {row['abundance']:>9.5f} {row['q_value']:>14.3f} {row['threshold']:>16.3f} {'yes' if row['open_at_min'] else 'no':>11}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="List the neutron-induced channels open on stable isotopes")
+    parser.add_argument("--elements", nargs="*", help="element symbols, all elements if omitted")
+    parser.add_argument("--energy", type=float, nargs=2, default=(0., 10e3), metavar=("MIN", "MAX"), help="neutron energy range [keV], channels opening below MAX are listed and those already open at MIN are marked")
+    parser.add_argument("--masses", default="data/nist_isotope_mass.txt")
+    args: argparse.Namespace = parser.parse_args()
+
+    print(format_channel_table(screen_channels(NIST_isotope_mass(args.masses), tuple(args.energy), args.elements)))
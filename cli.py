@@ -0,0 +1,99 @@
+import argparse
+import sys
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import KinematicThresholds
+from reactions import Reaction, ReactionGraph, StageResult, level_label
+
+from numpy.typing import NDArray
+
+# Only numpy and the kinematics modules are imported at start-up; matplotlib and the figure code are
+# imported by the render command alone, and the mass table is read from its binary cache when one exists
+
+def load_masses(args: argparse.Namespace) -> NIST_isotope_mass:
+    return NIST_isotope_mass(args.masses)
+
+def qvalue_command(args: argparse.Namespace) -> None:
+    masses: NIST_isotope_mass = load_masses(args)
+    for text in args.reaction:
+        reaction: Reaction = Reaction.from_string(text, tuple(args.level))
+        for level in reaction.levels:
+            print(f"{reaction.name}({level_label(level)}) Q-value: {reaction.q_value(masses, level) : .3f} keV")
+
+def threshold_command(args: argparse.Namespace) -> None:
+    masses: NIST_isotope_mass = load_masses(args)
+    for text in args.reaction:
+        reaction: Reaction = Reaction.from_string(text, tuple(args.level))
+        thresholds: KinematicThresholds = reaction.thresholds(masses, tuple(args.angle))
+        for i, level in enumerate(reaction.levels):
+            for j, angle in enumerate(args.angle):
+                line: str = f"{reaction.name}({level_label(level)}) {angle:g} deg: opens at {thresholds.lower[i, j]:.3f} keV"
+                if np.isfinite(thresholds.upper[i, j]):
+                    line += f", closes at {thresholds.upper[i, j]:.3f} keV"
+                if thresholds.double_valued_limit[i, j] > thresholds.lower[i, j]:
+                    line += f", double-valued below {thresholds.double_valued_limit[i, j]:.3f} keV"
+                print(line)
+
+def peaks_command(args: argparse.Namespace) -> None:
+    # The first reaction is driven by the beam, every further reaction by the ejectile of the one before it,
+    # taken along the incoming direction
+    reactions: list[Reaction] = [Reaction.from_string(args.reaction[0], (args.level,))]
+    reactions += [Reaction.from_string(text, (args.detector_level,)) for text in args.reaction[1:]]
+
+    beam_energy: NDArray[np.float64] = np.asarray(args.beam_energy, dtype=np.float64)
+    graph: ReactionGraph = ReactionGraph(load_masses(args), beam_energy)
+    source: str | None = None
+    for k, reaction in enumerate(reactions):
+        source = graph.add_stage(f"stage{k}", reaction, (args.angle,) if k == 0 else (0.,), source, args.branch if k == 0 else "plus").name
+
+    result: StageResult = graph.evaluate(source)
+    energy: NDArray[np.float64] = result.energy.reshape(-1)
+
+    print(" <- ".join(reaction.name for reaction in reversed(reactions)))
+    for beam, ejectile in zip(beam_energy, energy):
+        print(f"{beam:12.3f} keV -> " + (f"{ejectile:12.3f} keV" if np.isfinite(ejectile) else "closed"))
+
+def render_command(args: argparse.Namespace) -> None:
+    import main
+    main.main()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Q-values, thresholds and peak energies of reactions such as 13C(a,n)16O")
+    parser.add_argument("--masses", default="data/nist_isotope_mass.txt")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    qvalue: argparse.ArgumentParser = commands.add_parser("qvalue", help="Q-value of each reaction")
+    qvalue.add_argument("reaction", nargs="+", help="e.g. 79Br(n,p)79Se")
+    qvalue.add_argument("--level", type=float, nargs="+", default=[0.], help="recoil excitation energies [keV]")
+    qvalue.set_defaults(func=qvalue_command)
+
+    threshold: argparse.ArgumentParser = commands.add_parser("threshold", help="projectile energies where each reaction opens and closes")
+    threshold.add_argument("reaction", nargs="+")
+    threshold.add_argument("--angle", type=float, nargs="+", default=[0.], help="ejectile lab angles [deg]")
+    threshold.add_argument("--level", type=float, nargs="+", default=[0.], help="recoil excitation energies [keV]")
+    threshold.set_defaults(func=threshold_command)
+
+    peaks: argparse.ArgumentParser = commands.add_parser("peaks", help="ejectile energy of a reaction chain, e.g. 13C(a,n)16O 79Br(n,p)79Se")
+    peaks.add_argument("reaction", nargs="+", help="source reaction followed by the reactions it feeds")
+    peaks.add_argument("--beam-energy", type=float, nargs="+", required=True, help="[keV]")
+    peaks.add_argument("--angle", type=float, default=0., help="lab angle of the source ejectile [deg]")
+    peaks.add_argument("--level", type=float, default=0., help="recoil excitation of the source reaction [keV]")
+    peaks.add_argument("--detector-level", type=float, default=0., help="recoil excitation of the following reactions [keV]")
+    peaks.add_argument("--branch", choices=("plus", "minus"), default="plus", help="kinematic branch of the source reaction")
+    peaks.set_defaults(func=peaks_command)
+
+    render: argparse.ArgumentParser = commands.add_parser("render", help="run the full analysis and render the figures")
+    render.set_defaults(func=render_command)
+
+    return parser
+
+if __name__ == "__main__":
+    args: argparse.Namespace = build_parser().parse_args()
+    try:
+        args.func(args)
+    except ValueError as error:
+        sys.exit(f"error: {error}")
+    except KeyError as error:
+        sys.exit(f"error: no mass for {error}")
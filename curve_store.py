@@ -0,0 +1,137 @@
+import argparse
+import zipfile
+
+from typing import BinaryIO, NamedTuple
+
+import numpy as np
+
+from reactions import ReactionGraph, StageResult
+from peak_index import CurveMetadata, curve_metadata, stage_chain
+from uncertainty import CurveUncertainty, graph_uncertainties
+
+from numpy.typing import NDArray
+
+class Curve(NamedTuple):
+    stage: str
+    reaction: str
+    branch: str
+    label: str
+    levels: tuple[float, ...]       # recoil level of each stage, outermost stage first
+    angles: tuple[float, ...]       # ejectile lab angle of each stage, outermost stage first
+    beam_energy: NDArray[np.float64]
+    energy: NDArray[np.float64]     # NaN where the chain is closed
+    valid: NDArray[np.bool_]
+    sigma: NDArray[np.float64]      # 1 sigma of the energy from the mass uncertainties
+    weight: NDArray[np.float64]     # relative intensity, NaN where unknown
+
+# Per-point columns, all curves concatenated; curve i is rows curve_offsets[i]:curve_offsets[i + 1]
+point_columns: tuple[str, ...] = ("beam_energy", "energy", "valid", "sigma", "weight")
+
+def export_curves(graph: ReactionGraph, filename: str | BinaryIO, weights: dict[str, NDArray[np.float64]] | None = None) -> None:
+    depth: int = max(len(stage_chain(graph, name)) for name in graph.stages)
+    metadata: dict[str, list] = {"curve_stage": [], "curve_reaction": [], "curve_branch": [], "curve_label": [], "curve_levels": [], "curve_angles": []}
+    columns: dict[str, list[NDArray]] = {column: [] for column in point_columns}
+    lengths: list[int] = []
+    uncertainties: dict[str, CurveUncertainty] = graph_uncertainties(graph)
+
+    for name in graph.stages:
+        result: StageResult = graph.evaluate(name)
+        curves: CurveMetadata = curve_metadata(graph, name, depth)
+        energy: NDArray[np.float64] = result.energy.reshape(-1, result.energy.shape[-1])
+        valid: NDArray[np.bool_] = result.valid.reshape(energy.shape)
+
+        metadata["curve_stage"].extend([name] * energy.shape[0])
+        metadata["curve_reaction"].extend([curves.chain[0].reaction.name] * energy.shape[0])
+        metadata["curve_branch"].extend([curves.chain[0].branch] * energy.shape[0])
+        metadata["curve_label"].extend(curves.labels)
+        metadata["curve_levels"].append(curves.levels)
+        metadata["curve_angles"].append(curves.angles)
+
+        columns["beam_energy"].append(np.broadcast_to(result.beam_energy, energy.shape).ravel())
+        columns["energy"].append(energy.ravel())
+        columns["valid"].append(valid.ravel())
+        columns["sigma"].append(uncertainties[name].sigma.ravel())
+        columns["weight"].append(weights[name].ravel() if weights is not None else np.full(energy.size, np.nan))
+        lengths.extend([energy.shape[1]] * energy.shape[0])
+
+    arrays: dict[str, NDArray] = {
+        "curve_stage": np.array(metadata["curve_stage"]),
+        "curve_reaction": np.array(metadata["curve_reaction"]),
+        "curve_branch": np.array(metadata["curve_branch"]),
+        "curve_label": np.array(metadata["curve_label"]),
+        "curve_levels": np.concatenate(metadata["curve_levels"]),
+        "curve_angles": np.concatenate(metadata["curve_angles"]),
+        "curve_offsets": np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+    }
+    arrays.update({column: np.concatenate(columns[column]) for column in point_columns})
+
+    # np.savez stores members uncompressed, which is what allows CurveStore to memory-map them
+    np.savez(filename, **arrays)
+
+def _memmap_member(filename: str, member: str) -> NDArray:
+    # Locates the .npy data of an uncompressed .npz member and memory-maps it in place
+    with zipfile.ZipFile(filename) as archive:
+        info: zipfile.ZipInfo = archive.getinfo(member + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"Member '{member}' of {filename} is compressed and cannot be memory-mapped")
+
+    with open(filename, "rb") as f:
+        # Local file header: 30 fixed bytes, then the file name and the extra field
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(f.read(4), dtype="<u2")
+        f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+
+        version: tuple[int, int] = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        offset: int = f.tell()
+
+    if dtype.hasobject:
+        raise ValueError(f"Member '{member}' of {filename} holds Python objects")
+    return np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran_order else "C")
+
+class CurveStore:
+    def __init__(self, filename: str):
+        self._filename: str = filename
+        # Metadata is small and read eagerly, the per-point columns stay on disk
+        with np.load(filename) as f:
+            self._metadata: dict[str, NDArray] = {key: f[key] for key in f.files if key.startswith("curve_")}
+        self._columns: dict[str, NDArray] = {column: _memmap_member(filename, column) for column in point_columns}
+
+    def __len__(self) -> int:
+        return self._metadata["curve_offsets"].size - 1
+
+    @property
+    def metadata(self) -> dict[str, NDArray]:
+        return self._metadata
+
+    def find(self, stage: str | None = None, levels: tuple[float, ...] | None = None, angles: tuple[float, ...] | None = None) -> NDArray[np.intp]:
+        # levels and angles are matched from the outermost stage, missing trailing entries match anything
+        selected: NDArray[np.bool_] = np.ones(len(self), dtype=np.bool_)
+        if stage is not None:
+            selected &= self._metadata["curve_stage"] == stage
+        if levels is not None:
+            selected &= np.all(self._metadata["curve_levels"][:, :len(levels)] == np.asarray(levels), axis=1)
+        if angles is not None:
+            selected &= np.all(self._metadata["curve_angles"][:, :len(angles)] == np.asarray(angles), axis=1)
+        return np.flatnonzero(selected)
+
+    def curve(self, index: int) -> Curve:
+        m: dict[str, NDArray] = self._metadata
+        start, stop = int(m["curve_offsets"][index]), int(m["curve_offsets"][index + 1])
+        levels: NDArray[np.float64] = m["curve_levels"][index]
+        angles: NDArray[np.float64] = m["curve_angles"][index]
+        return Curve(str(m["curve_stage"][index]), str(m["curve_reaction"][index]), str(m["curve_branch"][index]), str(m["curve_label"][index]),
+                     tuple(levels[~np.isnan(levels)].tolist()), tuple(angles[~np.isnan(angles)].tolist()),
+                     *(self._columns[column][start:stop] for column in point_columns))
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="List the curves in a curve store written by main.py")
+    parser.add_argument("store")
+    parser.add_argument("--stage", help="only curves of this stage")
+    args: argparse.Namespace = parser.parse_args()
+
+    store: CurveStore = CurveStore(args.store)
+    for index in store.find(args.stage):
+        curve: Curve = store.curve(index)
+        print(f"{index:5d} {curve.branch:<5} {int(curve.valid.sum()):7d}/{curve.valid.size:<7d} {curve.label}")
@@ -0,0 +1,128 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import eject_lab_from_cm
+from reactions import Reaction
+
+from numpy.typing import NDArray
+
+@dataclass(frozen=True)
+class ChannelModel:
+    # A reaction with its masses resolved, so models can be shipped to worker processes as plain numbers
+    reaction: Reaction
+    masses: tuple[float, float, float, float]
+    level_probabilities: tuple[float, ...]
+    angle_range: tuple[float, float] # lab angle of the ejectile [deg], emission is isotropic in the CM and kept in between
+    weight: float = 1.
+
+@dataclass(frozen=True)
+class EventModel:
+    source: ChannelModel
+    detectors: tuple[ChannelModel, ...]
+    beam_energy_range: tuple[float, float] # keV, sampled uniformly
+    histogram_range: tuple[float, float] = (0., 15e3) # keV
+    n_bins: int = 1500
+
+    @property
+    def histogram_names(self) -> tuple[str, ...]:
+        return ("neutron", "gamma", "charged") + tuple(detector.reaction.tag for detector in self.detectors)
+
+    @property
+    def bin_edges(self) -> NDArray[np.float64]:
+        return np.linspace(self.histogram_range[0], self.histogram_range[1], self.n_bins + 1)
+
+@dataclass
+class EventSpectra:
+    bin_edges: NDArray[np.float64]
+    counts: dict[str, NDArray[np.int64]]
+    n_events: int
+
+def channel_model(masses: NIST_isotope_mass, reaction: Reaction, angle_range: tuple[float, float], level_weights: tuple[float, ...] | None = None, weight: float = 1.) -> ChannelModel:
+    if level_weights is None:
+        level_weights = (1.,) * len(reaction.levels)
+    if len(level_weights) != len(reaction.levels):
+        raise ValueError(f"{reaction.name} has {len(reaction.levels)} levels, but {len(level_weights)} level weights were given")
+
+    probabilities: NDArray[np.float64] = np.asarray(level_weights, dtype=np.float64) / np.sum(level_weights)
+    return ChannelModel(reaction, reaction.masses(masses), tuple(probabilities.tolist()), angle_range, weight)
+
+def _sample_channel(rng: np.random.Generator, channel: ChannelModel, incoming: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.bool_], NDArray[np.float64]]:
+    # Ejectile energy, whether the event is physical and inside the lab angle range, and the recoil excitation.
+    # The emission direction is drawn uniformly in cos(theta_CM), so both kinematic branches come out with
+    # their dOmega_CM / dOmega_lab weight and no event carries a weight of its own.
+    levels: NDArray[np.float64] = np.asarray(channel.reaction.levels, dtype=np.float64)
+    recoil_ex: NDArray[np.float64] = levels[rng.choice(levels.size, incoming.size, p=channel.level_probabilities)]
+    cos_cm: NDArray[np.float64] = rng.uniform(-1., 1., incoming.size)
+
+    energy, lab_angle, valid = eject_lab_from_cm(incoming, cos_cm, *channel.masses, recoil_ex)
+    inside: NDArray[np.bool_] = (lab_angle >= channel.angle_range[0]) & (lab_angle <= channel.angle_range[1])
+    return (energy, valid & inside, recoil_ex)
+
+def _fill(counts: NDArray[np.int64], values: NDArray[np.float64], low: float, bin_width: float) -> None:
+    indices: NDArray[np.int64] = np.floor((values - low) / bin_width).astype(np.int64)
+    indices = indices[(indices >= 0) & (indices < counts.size)]
+    counts += np.bincount(indices, minlength=counts.size)
+
+def _generate_chunk(model: EventModel, rng: np.random.Generator, n: int, counts: dict[str, NDArray[np.int64]]) -> None:
+    low: float = model.histogram_range[0]
+    bin_width: float = (model.histogram_range[1] - model.histogram_range[0]) / model.n_bins
+
+    beam_energy: NDArray[np.float64] = rng.uniform(model.beam_energy_range[0], model.beam_energy_range[1], n)
+    neutron_energy, physical, source_ex = _sample_channel(rng, model.source, beam_energy)
+
+    neutron_energy = neutron_energy[physical]
+    source_ex = source_ex[physical]
+    _fill(counts["neutron"], neutron_energy, low, bin_width)
+    # De-excitation gammas of the recoil, Doppler shift neglected
+    _fill(counts["gamma"], source_ex[source_ex > 0], low, bin_width)
+
+    if not model.detectors:
+        return
+
+    # Every neutron interacts in exactly one detector channel, picked by the channel weights
+    weights: NDArray[np.float64] = np.array([detector.weight for detector in model.detectors])
+    detector_index: NDArray[np.intp] = rng.choice(weights.size, neutron_energy.size, p=weights / weights.sum())
+
+    for k, detector in enumerate(model.detectors):
+        ejectile_energy, physical, _ = _sample_channel(rng, detector, neutron_energy[detector_index == k])
+        ejectile_energy = ejectile_energy[physical]
+        _fill(counts[detector.reaction.tag], ejectile_energy, low, bin_width)
+        _fill(counts["charged"], ejectile_energy, low, bin_width)
+
+def _generate_chunks(model: EventModel, seed: int, chunk_size: int, first_chunk: int, last_chunk: int, n_events: int) -> dict[str, NDArray[np.int64]]:
+    counts: dict[str, NDArray[np.int64]] = {name: np.zeros(model.n_bins, dtype=np.int64) for name in model.histogram_names}
+
+    # Each chunk has its own seed, so the result does not depend on how chunks are spread over workers
+    for chunk in range(first_chunk, last_chunk):
+        rng: np.random.Generator = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+        n: int = min(chunk_size, n_events - chunk * chunk_size)
+        _generate_chunk(model, rng, n, counts)
+
+    return counts
+
+def generate_spectra(model: EventModel, n_events: int, chunk_size: int = 1_000_000, seed: int = 0, processes: int | None = 1) -> EventSpectra:
+    n_chunks: int = -(-n_events // chunk_size)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, n_chunks))
+
+    if processes == 1:
+        counts: dict[str, NDArray[np.int64]] = _generate_chunks(model, seed, chunk_size, 0, n_chunks, n_events)
+        return EventSpectra(model.bin_edges, counts, n_events)
+
+    boundaries: NDArray[np.intp] = np.linspace(0, n_chunks, processes + 1).astype(np.intp)
+    counts = {name: np.zeros(model.n_bins, dtype=np.int64) for name in model.histogram_names}
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_generate_chunks, model, seed, chunk_size, int(first), int(last), n_events) for first, last in zip(boundaries[:-1], boundaries[1:])]
+        for future in futures:
+            for name, worker_counts in future.result().items():
+                counts[name] += worker_counts
+
+    return EventSpectra(model.bin_edges, counts, n_events)
@@ -0,0 +1,150 @@
+import argparse
+import time
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import EjectKinematics, eject_kinematics, eject_kinematics_grid
+from reactions import Reaction
+from main import detector_reactions, source_reactions
+
+from numpy.typing import NDArray
+
+# Mathtext instead of LaTeX, so a redraw costs milliseconds
+explorer_style: dict[str, dict] = {
+    "text": {"usetex": False},
+    "mathtext": {"fontset": "cm"},
+    "axes": {"labelsize": 12, "titlesize": 12},
+}
+
+class Explorer:
+    # One figure with fixed axes limits; every control only swaps the data of the existing Line2D artists
+    # and blits them over the cached background
+    def __init__(self, masses: NIST_isotope_mass, source: Reaction, detectors: tuple[Reaction, ...], lab_energy: NDArray[np.float64], angle: float = 45.):
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import RadioButtons, Slider
+
+        self._source: Reaction = source
+        self._detectors: tuple[Reaction, ...] = detectors
+        self._lab_energy: NDArray[np.float64] = lab_energy
+        self._source_masses: tuple[float, float, float, float] = source.masses(masses)
+        self._detector_masses: list[tuple[float, float, float, float]] = [detector.masses(masses) for detector in detectors]
+
+        self._angle: float = angle
+        self._level: int = 0
+        self._detector: int | None = None
+        self._last_update: float = 0.
+
+        for group, settings in explorer_style.items():
+            plt.rc(group, **settings)
+
+        self.figure = plt.figure(figsize=(10, 7))
+        self._ax = self.figure.add_axes((0.08, 0.25, 0.62, 0.68))
+        self._ax.set_xlabel(r"$E_\alpha$ [keV]")
+        self._ax.set_ylabel("Ejectile energy [keV]")
+        self._ax.set_xlim(lab_energy[0], lab_energy[-1])
+        self._ax.set_ylim(0., self._energy_limit())
+
+        self._neutron_line = self._ax.plot([], [], "-", color="black", animated=True, label="$n$ from " + source.latex())[0]
+        self._ejectile_line = self._ax.plot([], [], "--", color="red", animated=True, label="detector ejectile at $0\\,$deg")[0]
+        self._title = self._ax.text(0.02, 0.97, "", transform=self._ax.transAxes, va="top", animated=True)
+        self._ax.legend(loc="upper right")
+
+        # Controls
+        self._angle_slider = Slider(self.figure.add_axes((0.08, 0.08, 0.62, 0.04)), r"$\theta_n$ [deg]", 0., 180., valinit=angle)
+        level_labels: list[str] = [source.recoil_latex(level) for level in source.levels]
+        detector_labels: list[str] = ["none"] + [detector.name for detector in detectors]
+        self._level_buttons = RadioButtons(self.figure.add_axes((0.75, 0.55, 0.22, 0.38)), level_labels)
+        self._detector_buttons = RadioButtons(self.figure.add_axes((0.75, 0.08, 0.22, 0.42)), detector_labels)
+        self._widgets = (self._angle_slider, self._level_buttons, self._detector_buttons)
+        for widget in self._widgets:
+            widget.drawon = False
+
+        self._angle_slider.on_changed(self.set_angle)
+        self._level_buttons.on_clicked(lambda label: self.set_level(level_labels.index(label)))
+        self._detector_buttons.on_clicked(lambda label: self.set_detector(detector_labels.index(label) - 1 if label != "none" else None))
+
+        self._background = None
+        self.figure.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _energy_limit(self) -> float:
+        # Fixed y range covering every level, angle and detector choice, so limits never change while exploring
+        angles: NDArray[np.float64] = np.linspace(0., 180., 37)
+        neutrons: EjectKinematics = eject_kinematics_grid(self._lab_energy[::16], angles, self._source.levels, *self._source_masses)
+        highest: float = float(np.nanmax(neutrons.plus))
+        neutron_energy: NDArray[np.float64] = np.linspace(0., highest, 64)
+        for detector, detector_masses in zip(self._detectors, self._detector_masses):
+            ejectiles: EjectKinematics = eject_kinematics_grid(neutron_energy, 0., detector.levels, *detector_masses)
+            highest = max(highest, float(np.nanmax(ejectiles.plus, initial=0.)))
+        return 1.05 * highest
+
+    def _on_draw(self, event) -> None:
+        self._background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self) -> None:
+        self._ax.draw_artist(self._neutron_line)
+        self._ax.draw_artist(self._ejectile_line)
+        self._ax.draw_artist(self._title)
+
+    def set_angle(self, angle: float) -> None:
+        self._angle = float(angle)
+        self.update(self._angle_slider)
+
+    def set_level(self, level: int) -> None:
+        self._level = level
+        self.update(self._level_buttons)
+
+    def set_detector(self, detector: int | None) -> None:
+        self._detector = detector
+        self.update(self._detector_buttons)
+
+    def update(self, changed_widget=None) -> None:
+        start: float = time.perf_counter()
+
+        neutrons: EjectKinematics = eject_kinematics(self._lab_energy, self._angle, *self._source_masses, self._source.levels[self._level])
+        neutron_energy: NDArray[np.float64] = np.where(neutrons.valid, neutrons.plus, np.nan)
+        self._neutron_line.set_data(self._lab_energy, neutron_energy)
+
+        title: str = f"{self._source.latex(self._source.levels[self._level])}, $\\theta_n={self._angle:.1f}\\,$deg"
+        if self._detector is None:
+            self._ejectile_line.set_data([], [])
+        else:
+            detector: Reaction = self._detectors[self._detector]
+            ejectiles: EjectKinematics = eject_kinematics(neutron_energy, 0., *self._detector_masses[self._detector], detector.levels[0])
+            self._ejectile_line.set_data(self._lab_energy, np.where(ejectiles.valid, ejectiles.plus, np.nan))
+            title += f", {detector.latex(detector.levels[0])}"
+        self._title.set_text(title)
+
+        self._blit(changed_widget)
+        self._last_update = time.perf_counter() - start
+
+    def _blit(self, changed_widget) -> None:
+        canvas = self.figure.canvas
+        if self._background is None:
+            canvas.draw_idle()
+            return
+
+        canvas.restore_region(self._background)
+        self._draw_animated()
+        # Widgets were told not to trigger full redraws, only the one that was used is redrawn
+        if changed_widget is not None:
+            self.figure.draw_artist(changed_widget.ax)
+        canvas.blit(self.figure.bbox)
+
+    @property
+    def last_update(self) -> float:
+        return self._last_update
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Interactive view of the source neutron and detector ejectile energies")
+    parser.add_argument("--energy", type=float, nargs=2, default=(4e3, 9e3), metavar=("MIN", "MAX"), help="alpha energy range [keV]")
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--masses", default="data/nist_isotope_mass.txt")
+    args: argparse.Namespace = parser.parse_args()
+
+    import matplotlib.pyplot as plt
+
+    explorer: Explorer = Explorer(NIST_isotope_mass(args.masses), source_reactions[0], detector_reactions, np.linspace(args.energy[0], args.energy[1], args.points))
+    explorer.update()
+    plt.show()
@@ -0,0 +1,160 @@
+import json
+import os
+import time
+import tracemalloc
+
+from typing import Any, NamedTuple
+
+class SpanEvent(NamedTuple):
+    path: tuple[str, ...]   # names of the enclosing spans, outermost first, ending with this span
+    start: int              # perf_counter_ns
+    duration: int           # ns
+    peak_memory: int | None # peak traced memory above the memory at the start of the span [bytes]
+    pid: int
+    args: dict[str, Any]
+
+_enabled: bool = False
+_track_memory: bool = False
+_events: list[SpanEvent] = []
+_stack: list["_Span"] = []
+
+class _NullSpan:
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+_null_span: _NullSpan = _NullSpan()
+
+class _Span:
+    def __init__(self, name: str, args: dict[str, Any]):
+        self.name: str = name
+        self.args: dict[str, Any] = args
+        self.path: tuple[str, ...] = ()
+        self.start: int = 0
+        self.start_memory: int = 0
+        self.peak: int = 0
+
+    def __enter__(self) -> "_Span":
+        self.path = (_stack[-1].path if _stack else ()) + (self.name,)
+        if _track_memory:
+            # The tracemalloc peak is global, so the peak seen so far is handed to the parent before it is reset
+            current, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = current
+            self.peak = current
+        _stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        duration: int = time.perf_counter_ns() - self.start
+        _stack.pop()
+        peak_memory: int | None = None
+        if _track_memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak_memory = self.peak - self.start_memory
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, self.peak)
+        _events.append(SpanEvent(self.path, self.start, duration, peak_memory, os.getpid(), self.args))
+
+def span(name: str, **args: Any) -> _Span | _NullSpan:
+    # With instrumentation off this returns a shared no-op context manager
+    if not _enabled:
+        return _null_span
+    return _Span(name, args)
+
+def enable(track_memory: bool = False) -> None:
+    global _enabled, _track_memory
+    _enabled = True
+    _track_memory = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def disable() -> None:
+    global _enabled, _track_memory
+    if _track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = False
+    _track_memory = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def settings() -> tuple[bool, bool]:
+    return (_enabled, _track_memory)
+
+def events() -> list[SpanEvent]:
+    return list(_events)
+
+def collect() -> list[SpanEvent]:
+    # Returns and clears the recorded events, used to ship events from worker processes
+    collected: list[SpanEvent] = list(_events)
+    _events.clear()
+    return collected
+
+def add_events(events: list[SpanEvent]) -> None:
+    # Events recorded elsewhere (e.g. in a worker process) are nested under the currently open span
+    prefix: tuple[str, ...] = _stack[-1].path if _stack else ()
+    _events.extend(event._replace(path=prefix + event.path) for event in events)
+
+def report(events: list[SpanEvent] | None = None) -> str:
+    if events is None:
+        events = _events
+
+    # Aggregate by path, in order of first appearance of each path
+    calls: dict[tuple[str, ...], int] = {}
+    total: dict[tuple[str, ...], int] = {}
+    peak: dict[tuple[str, ...], int | None] = {}
+    first_start: dict[tuple[str, ...], int] = {}
+    for event in events:
+        calls[event.path] = calls.get(event.path, 0) + 1
+        total[event.path] = total.get(event.path, 0) + event.duration
+        first_start[event.path] = min(first_start.get(event.path, event.start), event.start)
+        if event.peak_memory is not None:
+            peak[event.path] = max(peak.get(event.path) or 0, event.peak_memory)
+
+    children_total: dict[tuple[str, ...], int] = {}
+    for path, duration in total.items():
+        if len(path) > 1:
+            children_total[path[:-1]] = children_total.get(path[:-1], 0) + duration
+
+    # Depth-first order: every path sorts after its parent, siblings by first start
+    def sort_key(path: tuple[str, ...]) -> tuple[int, ...]:
+        return tuple(first_start.get(path[:k], 0) for k in range(1, len(path) + 1))
+
+    lines: list[str] = [f"{'span':<60} {'calls':>7} {'total [ms]':>11} {'self [ms]':>10} {'peak [MB]':>10}"]
+    for path in sorted(total, key=sort_key):
+        name: str = "  " * (len(path) - 1) + path[-1]
+        # Children that ran in parallel worker processes can add up to more than their parent
+        self_time: int = max(total[path] - children_total.get(path, 0), 0)
+        peak_string: str = f"{peak[path] / 2**20:10.2f}" if peak.get(path) is not None else f"{'':>10}"
+        lines.append(f"{name:<60} {calls[path]:>7} {total[path] * 1e-6:11.3f} {self_time * 1e-6:10.3f} {peak_string}")
+    return "\n".join(lines)
+
+def write_chrome_trace(filename: str, events: list[SpanEvent] | None = None) -> None:
+    # Complete ("X") events in microseconds, loadable in chrome://tracing or Perfetto
+    if events is None:
+        events = _events
+
+    trace_events: list[dict[str, Any]] = []
+    for event in events:
+        args: dict[str, Any] = dict(event.args)
+        if event.peak_memory is not None:
+            args["peak_memory"] = event.peak_memory
+        trace_events.append({
+            "name": event.path[-1],
+            "cat": "/".join(event.path[:-1]),
+            "ph": "X",
+            "ts": event.start / 1e3,
+            "dur": event.duration / 1e3,
+            "pid": event.pid,
+            "tid": event.pid,
+            "args": args,
+        })
+
+    with open(filename, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f, default=str)
@@ -0,0 +1,149 @@
+import argparse
+import os
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from reactions import Reaction, ReactionGraph, Stage, StageResult, level_label, nuclide_abundance
+from build_cache import hash_inputs
+
+from numpy.typing import ArrayLike, NDArray
+
+def load_cross_section(filename: str) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    # Two whitespace separated columns, projectile lab energy [keV] and cross-section [mb], "#" starts a comment
+    table: NDArray[np.float64] = np.loadtxt(filename, comments="#", ndmin=2)
+    if table.shape[1] < 2:
+        raise ValueError(f"{filename} needs two columns, energy and cross-section")
+
+    energy: NDArray[np.float64] = table[:, 0]
+    cross_section: NDArray[np.float64] = table[:, 1]
+    if np.any(np.diff(energy) <= 0):
+        raise ValueError(f"Energies in {filename} must be strictly increasing")
+    if np.any(cross_section < 0):
+        raise ValueError(f"Cross-sections in {filename} must not be negative")
+    return (energy, cross_section)
+
+class CrossSection:
+    # Linear interpolation over whole arrays. Below the table the channel counts as closed, above it the
+    # cross-section is unknown and comes out as NaN rather than an extrapolated guess.
+    def __init__(self, energy: ArrayLike, cross_section: ArrayLike):
+        self._energy: NDArray[np.float64] = np.asarray(energy, dtype=np.float64)
+        self._cross_section: NDArray[np.float64] = np.asarray(cross_section, dtype=np.float64)
+
+    @classmethod
+    def from_file(cls, filename: str) -> "CrossSection":
+        return cls(*load_cross_section(filename))
+
+    @property
+    def energy_range(self) -> tuple[float, float]:
+        return (float(self._energy[0]), float(self._energy[-1]))
+
+    @property
+    def table(self) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        return (self._energy, self._cross_section)
+
+    def __call__(self, energy: ArrayLike) -> NDArray[np.float64]:
+        return np.interp(energy, self._energy, self._cross_section, left=0., right=np.nan)
+
+class CrossSectionLibrary:
+    # Interpolators keyed by channel, i.e. reaction and recoil level. A channel reads
+    # "{directory}/{reaction tag}_{level label}.txt", e.g. Br79_n_p_Se79_gs.txt, and falls back to
+    # "{directory}/{reaction tag}.txt" shared by all levels. Each file is read once; channels without
+    # a file get None and are weighted by abundance alone.
+    def __init__(self, directory: str):
+        self._directory: str = directory
+        self._interpolators: dict[tuple[str, float], CrossSection | None] = {}
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def channel_files(self, reaction: Reaction, level: float) -> tuple[str, str]:
+        return (os.path.join(self._directory, f"{reaction.tag}_{level_label(level)}.txt"), os.path.join(self._directory, f"{reaction.tag}.txt"))
+
+    def get(self, reaction: Reaction, level: float) -> CrossSection | None:
+        key: tuple[str, float] = (reaction.tag, level)
+        if key not in self._interpolators:
+            filenames: list[str] = [filename for filename in self.channel_files(reaction, level) if os.path.exists(filename)]
+            self._interpolators[key] = CrossSection.from_file(filenames[0]) if filenames else None
+        return self._interpolators[key]
+
+    def tables(self, reaction: Reaction) -> list[tuple[NDArray[np.float64], NDArray[np.float64]] | None]:
+        # The tabulated values behind each level of the reaction, for build keys
+        return [None if cross_section is None else cross_section.table for cross_section in (self.get(reaction, level) for level in reaction.levels)]
+
+    def missing(self, reactions: tuple[Reaction, ...]) -> list[str]:
+        return [f"{reaction.name}({level_label(level)})" for reaction in reactions for level in reaction.levels if self.get(reaction, level) is None]
+
+def _stage_weights(graph: ReactionGraph, name: str, cross_sections: CrossSectionLibrary, cache: dict[str, NDArray[np.float64]]) -> NDArray[np.float64]:
+    if name in cache:
+        return cache[name]
+
+    stage: Stage = graph.stages[name]
+    result: StageResult = graph.evaluate(name)
+    if stage.source is None:
+        incoming: NDArray[np.float64] = graph.beam_energy
+        # The source target is the prepared source material, its natural abundance does not apply
+        upstream: NDArray[np.float64] | float = 1.
+    else:
+        incoming = graph.evaluate(stage.source).energy
+        upstream = _stage_weights(graph, stage.source, cross_sections, cache) * nuclide_abundance(graph.masses, stage.reaction.target)
+
+    # (level) + shape of the incoming energies, the same for every ejectile angle
+    per_level: NDArray[np.float64] = np.ones((len(stage.reaction.levels),) + incoming.shape)
+    for i, level in enumerate(stage.reaction.levels):
+        cross_section: CrossSection | None = cross_sections.get(stage.reaction, level)
+        if cross_section is not None:
+            per_level[i] = cross_section(incoming)
+
+    weights: NDArray[np.float64] = np.broadcast_to(per_level[:, np.newaxis] * upstream, result.energy.shape)
+    cache[name] = np.where(result.valid, weights, np.nan)
+    return cache[name]
+
+def weights_key(graph: ReactionGraph, name: str, cross_sections: CrossSectionLibrary) -> str:
+    # Covers what the weights of a stage add to its stage_key: the target abundances and cross-section
+    # tables along the chain. Only the tables are read, nothing is evaluated.
+    stage: Stage = graph.stages[name]
+    tables: list = cross_sections.tables(stage.reaction)
+    if stage.source is None:
+        return hash_inputs(tables)
+    return hash_inputs(tables, nuclide_abundance(graph.masses, stage.reaction.target), weights_key(graph, stage.source, cross_sections))
+
+def curve_weights_key(graph: ReactionGraph, name: str, index: tuple[int, ...], cross_sections: CrossSectionLibrary) -> str:
+    # weights_key of the single curve at index, along the chain of curves of curve_key
+    stage: Stage = graph.stages[name]
+    cross_section: CrossSection | None = cross_sections.get(stage.reaction, stage.reaction.levels[index[0]])
+    table: tuple | None = None if cross_section is None else cross_section.table
+    if stage.source is None:
+        return hash_inputs(table)
+    return hash_inputs(table, nuclide_abundance(graph.masses, stage.reaction.target), curve_weights_key(graph, stage.source, index[2:], cross_sections))
+
+def stage_weights(graph: ReactionGraph, name: str, cross_sections: CrossSectionLibrary) -> NDArray[np.float64]:
+    return _stage_weights(graph, name, cross_sections, {})
+
+def graph_weights(graph: ReactionGraph, cross_sections: CrossSectionLibrary) -> dict[str, NDArray[np.float64]]:
+    # Relative intensity of every point of every stage, shaped like the stage energies and NaN where closed:
+    # the cross-section of each stage at its incoming energy, times the natural abundance of the target of
+    # every stage fed by another one. Upstream weights are shared, so every stage is evaluated once.
+    cache: dict[str, NDArray[np.float64]] = {}
+    return {name: _stage_weights(graph, name, cross_sections, cache) for name in graph.stages}
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Relative intensity of a neutron-induced channel from abundance and cross-section")
+    parser.add_argument("reaction", nargs="+", help="e.g. 79Br(n,p)79Se")
+    parser.add_argument("--energy", type=float, nargs="+", default=[1e3, 2e3, 4e3, 6e3, 8e3], help="neutron energies [keV]")
+    parser.add_argument("--cross-sections", default="data/cross_sections", help="directory of tabulated cross-sections")
+    parser.add_argument("--masses", default="data/nist_isotope_mass.txt")
+    args: argparse.Namespace = parser.parse_args()
+
+    masses: NIST_isotope_mass = NIST_isotope_mass(args.masses)
+    library: CrossSectionLibrary = CrossSectionLibrary(args.cross_sections)
+    energy: NDArray[np.float64] = np.asarray(args.energy, dtype=np.float64)
+
+    print(f"{'channel':<28} {'abundance':>9} " + " ".join(f"{e:>10g}" for e in energy))
+    for text in args.reaction:
+        reaction: Reaction = Reaction.from_string(text)
+        cross_section: CrossSection | None = library.get(reaction, 0.)
+        abundance: float = nuclide_abundance(masses, reaction.target)
+        intensity: NDArray[np.float64] = abundance * (cross_section(energy) if cross_section is not None else np.ones(energy.shape))
+        print(f"{reaction.name:<28} {abundance:>9.4f} " + " ".join(f"{value:>10.4g}" for value in intensity) + ("" if cross_section is not None else "  (no cross-section table)"))
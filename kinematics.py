@@ -0,0 +1,225 @@
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from numpy.typing import ArrayLike, NDArray
+
+class EjectKinematics(NamedTuple):
+    # Each root counts only where it is a physical solution, i.e. where the lab velocity
+    # (enum1 +- enum2) / (M + m_e) itself is positive and not just its square; elsewhere it is NaN
+    plus: NDArray[np.float64]
+    minus: NDArray[np.float64]
+    plus_valid: NDArray[np.bool_]
+    minus_valid: NDArray[np.bool_]
+
+    @property
+    def valid(self) -> NDArray[np.bool_]:
+        # The channel is open wherever any root is physical, and the minus root never is without the plus one
+        return self.plus_valid
+
+def lab_energy_to_cm(lab_energy: NDArray[np.float64], proj_mass: float, target_mass: float) -> NDArray[np.float64]:
+    factor: float = target_mass / (proj_mass + target_mass)
+    return lab_energy * factor
+
+def cm_energy_to_lab(cm_energy: NDArray[np.float64], proj_mass: float, target_mass: float) -> NDArray[np.float64]:
+    factor: float = (proj_mass + target_mass) / target_mass
+    return cm_energy * factor
+
+def eject_lab_energy(lab_energy: NDArray[np.float64], lab_angle: float, proj_mass: float, target_mass: float, eject_mass: float, recoil_mass: float, recoil_ex: float) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    lab_angle = np.deg2rad(lab_angle)
+    q_value: float = proj_mass + target_mass - eject_mass - recoil_mass - recoil_ex
+
+    enum1: NDArray[np.float64] = np.sqrt( (proj_mass * eject_mass) * lab_energy) * np.cos(lab_angle)
+    enum2: NDArray[np.float64] = np.sqrt( (proj_mass * eject_mass * np.power(np.cos(lab_angle), 2)) * lab_energy \
+                                         + (recoil_mass + eject_mass) * (recoil_mass * q_value + (recoil_mass - proj_mass) * lab_energy) )
+
+    result_plus: NDArray[np.float64] = np.power((enum1 + enum2) / (recoil_mass + eject_mass), 2)
+    result_minus: NDArray[np.float64] = np.power((enum1 - enum2) / (recoil_mass + eject_mass), 2)
+
+    return (result_plus, result_minus)
+
+def gamma_energy(lab_energy: NDArray[np.float64], proj_mass: float, target_mass: float, recoil_mass: float, recoil_ex: float) -> NDArray[np.float64]:
+    q_value: float = proj_mass + target_mass - recoil_mass - recoil_ex
+
+    momentum2: NDArray[np.float64] = (2 * proj_mass ) * lab_energy
+
+    recoil_energy: NDArray[np.float64] = momentum2 / (2 * (recoil_mass + recoil_ex))
+
+    return lab_energy + q_value - recoil_energy
+
+def has_enough_energy(lab_energy: NDArray[np.float64], lab_angle: float, proj_mass: float, target_mass: float, eject_mass: float, recoil_mass: float, recoil_ex: float) -> NDArray[np.bool_]:
+    return eject_kinematics(lab_energy, lab_angle, proj_mass, target_mass, eject_mass, recoil_mass, recoil_ex).valid
+
+def eject_kinematics(lab_energy: ArrayLike, lab_angle: ArrayLike, proj_mass: ArrayLike, target_mass: ArrayLike, eject_mass: ArrayLike, recoil_mass: ArrayLike, recoil_ex: ArrayLike) -> EjectKinematics:
+    # All arguments broadcast against each other; points where a root is not physical are NaN in its branch
+    lab_energy = np.asarray(lab_energy, dtype=np.float64)
+    cos_angle: NDArray[np.float64] = np.cos(np.deg2rad(np.asarray(lab_angle, dtype=np.float64)))
+    q_value: NDArray[np.float64] = np.asarray(proj_mass + target_mass - eject_mass - recoil_mass - recoil_ex, dtype=np.float64)
+
+    discriminant: NDArray[np.float64] = (proj_mass * eject_mass * cos_angle * cos_angle) * lab_energy \
+                                        + (recoil_mass + eject_mass) * (recoil_mass * q_value + (recoil_mass - proj_mass) * lab_energy)
+    valid: NDArray[np.bool_] = (q_value + lab_energy > 0) & (discriminant >= 0)
+
+    enum1: NDArray[np.float64] = np.sqrt((proj_mass * eject_mass) * lab_energy) * cos_angle
+    enum2: NDArray[np.float64] = np.sqrt(np.where(valid, discriminant, np.nan))
+
+    plus_valid: NDArray[np.bool_] = valid & (enum1 + enum2 > 0)
+    minus_valid: NDArray[np.bool_] = valid & (enum1 - enum2 > 0)
+
+    result_plus: NDArray[np.float64] = np.where(plus_valid, np.square((enum1 + enum2) / (recoil_mass + eject_mass)), np.nan)
+    result_minus: NDArray[np.float64] = np.where(minus_valid, np.square((enum1 - enum2) / (recoil_mass + eject_mass)), np.nan)
+
+    return EjectKinematics(*np.broadcast_arrays(result_plus, result_minus, plus_valid, minus_valid))
+
+def eject_kinematics_grid(lab_energy: ArrayLike, lab_angle: ArrayLike, recoil_ex: ArrayLike, proj_mass: float, target_mass: float, eject_mass: float, recoil_mass: float) -> EjectKinematics:
+    # Outer product over the three axes, result shape is (level, angle, energy)
+    lab_energy = np.asarray(lab_energy, dtype=np.float64).reshape(1, 1, -1)
+    lab_angle = np.asarray(lab_angle, dtype=np.float64).reshape(1, -1, 1)
+    recoil_ex = np.asarray(recoil_ex, dtype=np.float64).reshape(-1, 1, 1)
+
+    return eject_kinematics(lab_energy, lab_angle, proj_mass, target_mass, eject_mass, recoil_mass, recoil_ex)
+
+def gamma_energy_grid(lab_energy: ArrayLike, recoil_ex: ArrayLike, proj_mass: float, target_mass: float, recoil_mass: float) -> NDArray[np.float64]:
+    # Result shape is (level, energy)
+    lab_energy = np.asarray(lab_energy, dtype=np.float64).reshape(1, -1)
+    recoil_ex = np.asarray(recoil_ex, dtype=np.float64).reshape(-1, 1)
+
+    return gamma_energy(lab_energy, proj_mass, target_mass, recoil_mass, recoil_ex)
+
+def eject_lab_from_cm(lab_energy: ArrayLike, cos_cm: ArrayLike, proj_mass: ArrayLike, target_mass: ArrayLike, eject_mass: ArrayLike, recoil_mass: ArrayLike, recoil_ex: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.bool_]]:
+    # Ejectile lab energy and lab angle [deg] for emission at cos(theta_CM), and whether the channel is open.
+    # With sqrt(E_V) and sqrt(E_CM) as in branch_jacobians, the lab velocity is the CM velocity plus the
+    # CM emission velocity, so E_lab = E_V + E_CM + 2 sqrt(E_V E_CM) cos(theta_CM); every CM direction is physical.
+    lab_energy = np.asarray(lab_energy, dtype=np.float64)
+    cos_cm = np.asarray(cos_cm, dtype=np.float64)
+    q_value: NDArray[np.float64] = np.asarray(proj_mass + target_mass - eject_mass - recoil_mass - recoil_ex, dtype=np.float64)
+
+    sqrt_cm_motion: NDArray[np.float64] = np.sqrt(proj_mass * eject_mass * lab_energy) / (recoil_mass + eject_mass)
+    cm_energy: NDArray[np.float64] = (proj_mass * eject_mass * lab_energy + (recoil_mass + eject_mass) * (recoil_mass * q_value + (recoil_mass - proj_mass) * lab_energy)) \
+                                     / np.square(recoil_mass + eject_mass)
+    valid: NDArray[np.bool_] = (q_value + lab_energy > 0) & (cm_energy > 0)
+    sqrt_cm_energy: NDArray[np.float64] = np.sqrt(np.where(valid, cm_energy, np.nan))
+
+    along: NDArray[np.float64] = sqrt_cm_motion + sqrt_cm_energy * cos_cm
+    across: NDArray[np.float64] = sqrt_cm_energy * np.sqrt(1. - np.square(cos_cm))
+    energy: NDArray[np.float64] = np.square(along) + np.square(across)
+    lab_angle: NDArray[np.float64] = np.rad2deg(np.arctan2(across, along))
+
+    return (energy, lab_angle, np.broadcast_to(valid, energy.shape))
+
+class BranchJacobian(NamedTuple):
+    energy: NDArray[np.float64]   # ejectile lab energy [keV]
+    cos_cm: NDArray[np.float64]   # cosine of the CM emission angle
+    jacobian: NDArray[np.float64] # dOmega_CM / dOmega_lab
+    valid: NDArray[np.bool_]
+
+def branch_jacobians(kinematics: EjectKinematics, lab_energy: ArrayLike, lab_angle: ArrayLike, proj_mass: float, eject_mass: float, recoil_mass: float) -> tuple[BranchJacobian, BranchJacobian]:
+    # In units of sqrt(keV), sqrt(E_lab) = a +- b with a = sqrt(E_V) cos(theta) the part carried by the CM motion
+    # and b the part along the line of sight from the CM velocity, so b^2 = E_CM - E_V sin^2(theta).
+    # With these, cos(theta_CM) = (sqrt(E_lab) cos(theta) - sqrt(E_V)) / sqrt(E_CM) and
+    # dOmega_CM / dOmega_lab = E_lab / (sqrt(E_CM) b).
+    lab_energy = np.asarray(lab_energy, dtype=np.float64)
+    cos_angle: NDArray[np.float64] = np.cos(np.deg2rad(np.asarray(lab_angle, dtype=np.float64)))
+    sqrt_cm_motion: NDArray[np.float64] = np.sqrt(proj_mass * eject_mass * lab_energy) / (recoil_mass + eject_mass)
+
+    a: NDArray[np.float64] = sqrt_cm_motion * cos_angle
+    # sqrt(E_plus) = a + b wherever any root is physical
+    b: NDArray[np.float64] = np.sqrt(kinematics.plus) - a
+    sqrt_cm_energy: NDArray[np.float64] = np.sqrt(np.square(b) + np.square(sqrt_cm_motion) * (1. - np.square(cos_angle)))
+
+    branches: list[BranchJacobian] = []
+    for sign, energy, valid in ((1., kinematics.plus, kinematics.plus_valid), (-1., kinematics.minus, kinematics.minus_valid)):
+        sqrt_energy: NDArray[np.float64] = a + sign * b
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cos_cm: NDArray[np.float64] = np.clip((sqrt_energy * cos_angle - sqrt_cm_motion) / sqrt_cm_energy, -1., 1.)
+            jacobian: NDArray[np.float64] = energy / (sqrt_cm_energy * b)
+        # At b = 0, the edge of the kinematic cone, the Jacobian diverges integrably and the point is left out
+        branches.append(BranchJacobian(energy, cos_cm, np.where(valid & (b > 0), jacobian, 0.), valid))
+
+    return (branches[0], branches[1])
+
+class KinematicThresholds(NamedTuple):
+    lower: NDArray[np.float64]
+    upper: NDArray[np.float64]
+    merge: NDArray[np.float64]
+    double_valued_limit: NDArray[np.float64]
+
+def kinematic_thresholds(lab_angle: ArrayLike, proj_mass: ArrayLike, target_mass: ArrayLike, eject_mass: ArrayLike, recoil_mass: ArrayLike, recoil_ex: ArrayLike) -> KinematicThresholds:
+    # The discriminant in eject_lab_energy is linear in the beam energy, slope * E + offset, so the edges
+    # of the region accepted by has_enough_energy follow in closed form:
+    #   lower, upper         the channel is open for lower < E <= upper at this angle (lower = inf if never)
+    #   merge                the discriminant vanishes and the plus and minus branches meet
+    #   double_valued_limit  the minus branch is a physical solution below this energy (nan if never)
+    cos_angle: NDArray[np.float64] = np.cos(np.deg2rad(np.asarray(lab_angle, dtype=np.float64)))
+    q_value: NDArray[np.float64] = np.asarray(proj_mass + target_mass - eject_mass - recoil_mass - recoil_ex, dtype=np.float64)
+
+    slope: NDArray[np.float64] = proj_mass * eject_mass * cos_angle * cos_angle + (recoil_mass + eject_mass) * (recoil_mass - proj_mass)
+    offset: NDArray[np.float64] = (recoil_mass + eject_mass) * recoil_mass * q_value
+    slope, offset, q_value, cos_angle = np.broadcast_arrays(slope, offset, q_value, cos_angle)
+
+    # enum1 + enum2 > 0 and enum1 - enum2 > 0 reduce to comparing the beam energy with one edge, where
+    # M Q + (M - m_p) E changes sign: backward of 90 deg the plus root is physical only on one side of it,
+    # forward of 90 deg the minus root only on the other
+    with np.errstate(divide="ignore", invalid="ignore"):
+        merge: NDArray[np.float64] = np.where(slope != 0, -offset / slope, np.nan)
+        sign_edge: NDArray[np.float64] = np.where(recoil_mass != proj_mass, recoil_mass * q_value / (proj_mass - recoil_mass), np.where(q_value > 0, -np.inf, np.inf))
+    double_valued_limit: NDArray[np.float64] = np.where((cos_angle > 0) & (q_value < 0) & (recoil_mass > proj_mass), sign_edge, np.nan)
+
+    q_edge: NDArray[np.float64] = np.maximum(-q_value, 0.)
+    lower: NDArray[np.float64] = np.where(slope > 0, np.maximum(q_edge, merge), np.where((slope < 0) | (offset >= 0), q_edge, np.inf))
+    upper: NDArray[np.float64] = np.where(slope < 0, merge, np.inf)
+
+    # cos(90 deg) comes out as 6e-17, not 0
+    backward: NDArray[np.bool_] = cos_angle <= 1e-12
+    lower = np.where(backward & (recoil_mass >= proj_mass), np.maximum(lower, sign_edge), lower)
+    upper = np.where(backward & (recoil_mass < proj_mass), np.minimum(upper, sign_edge), upper)
+    lower = np.where(lower < upper, lower, np.inf)
+
+    return KinematicThresholds(lower, upper, merge, double_valued_limit)
+
+def refine_energy_grid(func: Callable[[NDArray[np.float64]], NDArray[np.float64]], grid: ArrayLike, tolerance: float, edge_tolerance: float = 1e-3, max_iterations: int = 64) -> NDArray[np.float64]:
+    # func maps a 1D energy grid of length n to curves of shape (..., n), NaN where a curve is closed.
+    # Intervals are bisected while the midpoint deviates from linear interpolation by more than tolerance,
+    # or while a curve opens or closes inside them and they are wider than edge_tolerance.
+    grid = np.unique(np.asarray(grid, dtype=np.float64))
+    values: NDArray[np.float64] = np.asarray(func(grid), dtype=np.float64).reshape(-1, grid.size)
+    active: NDArray[np.intp] = np.arange(grid.size - 1)
+
+    # Only the two halves of intervals split in the previous pass are evaluated again
+    for _ in range(max_iterations):
+        if active.size == 0:
+            break
+
+        midpoints: NDArray[np.float64] = 0.5 * (grid[active] + grid[active + 1])
+        mid_values: NDArray[np.float64] = np.asarray(func(midpoints), dtype=np.float64).reshape(-1, midpoints.size)
+        left: NDArray[np.float64] = values[:, active]
+        right: NDArray[np.float64] = values[:, active + 1]
+
+        open_left: NDArray[np.bool_] = ~np.isnan(left)
+        open_right: NDArray[np.bool_] = ~np.isnan(right)
+        open_mid: NDArray[np.bool_] = ~np.isnan(mid_values)
+
+        with np.errstate(invalid="ignore"):
+            error: NDArray[np.float64] = np.abs(mid_values - 0.5 * (left + right))
+            smooth_refine: NDArray[np.bool_] = (open_left & open_right & open_mid & (error > tolerance)).any(axis=0)
+        edge_refine: NDArray[np.bool_] = ((open_left != open_right) | (open_left != open_mid)).any(axis=0) & (grid[active + 1] - grid[active] > edge_tolerance)
+        refine: NDArray[np.bool_] = smooth_refine | edge_refine
+
+        refined: NDArray[np.intp] = active[refine]
+        grid = np.insert(grid, refined + 1, midpoints[refine])
+        values = np.insert(values, refined + 1, mid_values[:, refine], axis=1)
+
+        left_halves: NDArray[np.intp] = refined + np.arange(refined.size)
+        active = np.stack([left_halves, left_halves + 1], axis=1).ravel()
+
+    return grid
+
+def adaptive_energy_grid(start: float, stop: float, edges: ArrayLike, func: Callable[[NDArray[np.float64]], NDArray[np.float64]], tolerance: float = 1., n_coarse: int = 16, edge_tolerance: float = 1e-3) -> NDArray[np.float64]:
+    # Known edges (e.g. from kinematic_thresholds) are put on the grid exactly, together with a point
+    # edge_tolerance above them, so curves start at their threshold instead of at the next grid point
+    edges = np.ravel(np.asarray(edges, dtype=np.float64))
+    edges = edges[np.isfinite(edges) & (edges >= start) & (edges <= stop)]
+
+    initial: NDArray[np.float64] = np.concatenate([np.linspace(start, stop, n_coarse), edges, np.minimum(edges + edge_tolerance, stop)])
+
+    return refine_energy_grid(func, initial, tolerance, edge_tolerance)
@@ -1,480 +1,349 @@
+import argparse
+import dataclasses
+import os
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+import instrumentation
 
 from NIST_isotope_mass import NIST_isotope_mass
+from reactions import Reaction, ReactionGraph, StageResult, level_label, light_particles_latex
+from rendering import CurveSpec, FigureSpec, ImageSpec, default_style, render_figures
+from build_cache import BuildCache, BuildJob, curve_key, hash_inputs, stage_key
+from kinematics import adaptive_energy_grid
+from peak_index import PeakIndex
+from curve_store import export_curves
+from angular_spectra import AngularSpectra, angular_spectra
+from uncertainty import CurveUncertainty, graph_uncertainties
+from intensities import CrossSectionLibrary, curve_weights_key, graph_weights, weights_key
+from instrumentation import span
 
 from numpy.typing import NDArray
 
-def lab_energy_to_cm(lab_energy: NDArray[np.float64], proj_mass: float, target_mass: float) -> NDArray[np.float64]:
-    factor: float = target_mass / (proj_mass + target_mass)
-    return lab_energy * factor
-
-def cm_energy_to_lab(cm_energy: NDArray[np.float64], proj_mass: float, target_mass: float) -> NDArray[np.float64]:
-    factor: float = (proj_mass + target_mass) / target_mass
-    return cm_energy * factor
+O16_levels: tuple[float, ...] = (0., 6130., 6917., 7117.) # keV
+neutron_angles: tuple[float, ...] = (45., 90., 135.) # deg
+
+gamma_reactions: tuple[Reaction, ...] = (
+    Reaction("12C", "a", "g", "16O", O16_levels),
+)
+
+source_reactions: tuple[Reaction, ...] = (
+    Reaction("13C", "a", "n", "16O", O16_levels),
+)
+
+detector_reactions: tuple[Reaction, ...] = (
+    Reaction("79Br", "n", "p", "79Se"),
+    Reaction("81Br", "n", "p", "81Se"),
+    Reaction("79Br", "n", "a", "76As"),
+    Reaction("81Br", "n", "a", "78As"),
+)
+
+# Full-coverage neutron products: lab angle cells, neutron energy bins and the CM angular distribution
+# as Legendre coefficients, (1.,) is isotropic
+map_angle_edges: NDArray[np.float64] = np.linspace(0., 180., 361) # deg
+map_bin_edges: NDArray[np.float64] = np.linspace(0., 12e3, 601) # keV
+neutron_legendre: tuple[float, ...] = (1.,)
+map_beam_points: int = 4001 # uniform beam energy grid over the window, much finer than the energy bins
+
+# Width of the shaded band around each curve, in standard deviations propagated from the mass uncertainties
+band_sigma: float = 1.
+
+# Tabulated cross-sections of the detector channels, weighted with the natural abundance of the target,
+# see CrossSectionLibrary for the file names
+cross_section_directory: str = "data/cross_sections"
+
+linestyles: tuple[str, ...] = ("-", "--", "-.", ":")
+colors: tuple[str, ...] = ("black", "red", "blue", "green", "magenta", "orange")
+detector_colors: tuple[str, ...] = ("black", "blue", "green", "cyan", "magenta", "orange")
+
+def chain_name(source: Reaction, detector: Reaction) -> str:
+    return f"{source.tag}_{detector.tag}"
+
+def curve_weight(graph: ReactionGraph, weights: dict[str, NDArray[np.float64]], name: str, index: tuple[int, ...]) -> NDArray[np.float64]:
+    # Masked like StageResult.curve, so the weights line up with the curve points
+    return weights[name][index][graph.evaluate(name).valid[index]]
+
+def build_reaction_graph(nist_isotope_mass: NIST_isotope_mass, lab_energy: NDArray[np.float64], sources: tuple[Reaction, ...] | None = None,
+                         detectors: tuple[Reaction, ...] | None = None, gammas: tuple[Reaction, ...] | None = None, angles: tuple[float, ...] | None = None) -> ReactionGraph:
+    # Reactions and angles default to the module settings above, other setups (e.g. campaign points) pass their own
+    sources = source_reactions if sources is None else sources
+    detectors = detector_reactions if detectors is None else detectors
+    gammas = gamma_reactions if gammas is None else gammas
+    angles = neutron_angles if angles is None else angles
+    graph: ReactionGraph = ReactionGraph(nist_isotope_mass, lab_energy)
+
+    for reaction in gammas:
+        graph.add_stage(reaction.tag, reaction, angles)
+
+    # Each source stage is evaluated once and shared by all detector stages fed from it.
+    # Detector ejectiles are taken along the incoming neutron direction.
+    for source in sources:
+        graph.add_stage(source.tag, source, angles)
+
+        for detector in detectors:
+            graph.add_stage(chain_name(source, detector), detector, (0.,), source=source.tag)
+
+    return graph
+
+def build_energy_grid(nist_isotope_mass: NIST_isotope_mass, start: float, stop: float, tolerance: float = 1., sources: tuple[Reaction, ...] | None = None,
+                      detectors: tuple[Reaction, ...] | None = None, gammas: tuple[Reaction, ...] | None = None, angles: tuple[float, ...] | None = None) -> NDArray[np.float64]:
+    # Thresholds of the beam-driven stages are placed exactly; chained thresholds and curvature are found by bisection
+    edges: list[NDArray[np.float64]] = [source.thresholds(nist_isotope_mass, neutron_angles if angles is None else angles).lower.ravel()
+                                        for source in (source_reactions if sources is None else sources)]
+
+    def curves(lab_energy: NDArray[np.float64]) -> NDArray[np.float64]:
+        graph: ReactionGraph = build_reaction_graph(nist_isotope_mass, lab_energy, sources, detectors, gammas, angles)
+        return np.concatenate([result.energy.reshape(-1, lab_energy.size) for result in graph.evaluate_all().values()])
+
+    return adaptive_energy_grid(start, stop, np.concatenate(edges), curves, tolerance)
+
+def energy_label(particle: str) -> str:
+    return f"$E_{{{light_particles_latex[particle]}}}$ [keV]"
+
+def gamma_figure(graph: ReactionGraph, uncertainties: dict[str, CurveUncertainty], reaction: Reaction) -> FigureSpec:
+    gammas: StageResult = graph.evaluate(reaction.tag)
+
+    spec: FigureSpec = FigureSpec(f"figs/{reaction.tag}.png", f"{reaction.latex()} (labels for final state)", energy_label(reaction.projectile), energy_label(reaction.ejectile))
+    for i, level in enumerate(reaction.levels):
+        spec.curves.append(CurveSpec(*gammas.curve((i, 0)), linestyles[i % len(linestyles)], colors[i % len(colors)], reaction.recoil_latex(level), uncertainties[reaction.tag].band((i, 0), band_sigma)))
+    return spec
+
+def source_figure(graph: ReactionGraph, uncertainties: dict[str, CurveUncertainty], source: Reaction, i: int) -> FigureSpec:
+    neutrons: StageResult = graph.evaluate(source.tag)
+    level: float = source.levels[i]
+
+    spec: FigureSpec = FigureSpec(source_figure_filename(source, i), source.latex(level), energy_label(source.projectile), energy_label(source.ejectile))
+    for j, angle in enumerate(neutron_angles):
+        spec.curves.append(CurveSpec(*neutrons.curve((i, j)), linestyles[j % len(linestyles)], colors[j % len(colors)], f"$\\theta_\\mathrm{{LAB}}={angle:.0f}\\,$deg",
+                                     uncertainties[source.tag].band((i, j), band_sigma)))
+    return spec
+
+def source_figure_filename(source: Reaction, i: int) -> str:
+    return f"figs/{source.tag}_{level_label(source.levels[i])}.png"
+
+def chain_figure(graph: ReactionGraph, uncertainties: dict[str, CurveUncertainty], weights: dict[str, NDArray[np.float64]], source: Reaction, detector: Reaction, i: int, l: int) -> FigureSpec:
+    ejectiles: StageResult = graph.evaluate(chain_name(source, detector))
+    level: float = source.levels[i]
+    detector_level: float = detector.levels[l]
+
+    spec: FigureSpec = FigureSpec(chain_figure_filename(source, detector, i, l),
+                                  f"{source.latex(level)} to {detector.latex(detector_level)} $\\theta_{light_particles_latex[detector.ejectile]}=0\\,$deg",
+                                  f"Incoming {energy_label(source.projectile)}", energy_label(detector.ejectile))
+    for j, angle in enumerate(neutron_angles):
+        spec.curves.append(CurveSpec(*ejectiles.curve((l, 0, i, j)), linestyles[j % len(linestyles)], colors[j % len(colors)], f"$\\theta_{{n,\\mathrm{{LAB}}}}={angle:.0f}\\,$deg",
+                                     uncertainties[chain_name(source, detector)].band((l, 0, i, j), band_sigma),
+                                     curve_weight(graph, weights, chain_name(source, detector), (l, 0, i, j))))
+    return spec
+
+def chain_figure_filename(source: Reaction, detector: Reaction, i: int, l: int) -> str:
+    detector_suffix: str = "" if detector.levels[l] == 0 else f"_{level_label(detector.levels[l])}"
+    return f"figs/{source.tag}_{level_label(source.levels[i])}_{detector.tag}{detector_suffix}.png"
+
+def beam_weights(lab_energy: NDArray[np.float64]) -> NDArray[np.float64]:
+    # Trapezoid weights, the beam energy is averaged uniformly over the window
+    widths: NDArray[np.float64] = np.diff(lab_energy)
+    weights: NDArray[np.float64] = 0.5 * (np.append(widths, 0.) + np.insert(widths, 0, 0.))
+    return weights / weights.sum()
+
+def source_angular_spectra(graph: ReactionGraph, source: Reaction) -> AngularSpectra:
+    beam_energy: NDArray[np.float64] = np.linspace(graph.beam_energy[0], graph.beam_energy[-1], map_beam_points)
+    return angular_spectra(graph.masses, source, beam_energy, map_angle_edges, map_bin_edges, neutron_legendre, beam_weights(beam_energy))
+
+def map_figure(spectra: AngularSpectra, i: int) -> FigureSpec:
+    source: Reaction = spectra.reaction
+    # Per keV and sr, averaged over the beam energy window
+    solid_angle: NDArray[np.float64] = 2. * np.pi * np.abs(np.diff(np.cos(np.deg2rad(spectra.angle_edges))))
+    density: NDArray[np.float64] = spectra.maps[i] / solid_angle[:, np.newaxis] / np.diff(spectra.bin_edges)[np.newaxis, :]
+
+    return FigureSpec(map_figure_filename(source, i), f"{source.latex(source.levels[i])}, averaged over $E_\\alpha$",
+                      "$\\theta_\\mathrm{LAB}$ [deg]", energy_label(source.ejectile),
+                      image=ImageSpec(density.T, (spectra.angle_edges[0], spectra.angle_edges[-1], spectra.bin_edges[0], spectra.bin_edges[-1]),
+                                      "Neutrons per reaction [1/(keV sr)]", log=True))
+
+def map_figure_filename(source: Reaction, i: int) -> str:
+    return f"figs/{source.tag}_{level_label(source.levels[i])}_map.png"
+
+def spectra_figure(spectra: AngularSpectra) -> FigureSpec:
+    source: Reaction = spectra.reaction
+    centers: NDArray[np.float64] = 0.5 * (spectra.bin_edges[:-1] + spectra.bin_edges[1:])
+    averaged: NDArray[np.float64] = np.tensordot(spectra.spectra, beam_weights(spectra.beam_energy), axes=([1], [0]))
+
+    spec: FigureSpec = FigureSpec(f"figs/{source.tag}_spectra.png", f"{source.latex()} over all angles, averaged over $E_\\alpha$",
+                                  energy_label(source.ejectile), "Neutrons per reaction and keV")
+    for i, level in enumerate(source.levels):
+        spec.curves.append(CurveSpec(centers, averaged[i] / np.diff(spectra.bin_edges), linestyles[i % len(linestyles)], colors[i % len(colors)], source.recoil_latex(level)))
+    return spec
+
+def peaks_figure(graph: ReactionGraph, uncertainties: dict[str, CurveUncertainty], weights: dict[str, NDArray[np.float64]], j: int) -> FigureSpec:
+    angle: float = neutron_angles[j]
+    sources_latex: str = ", ".join(source.latex() for source in source_reactions)
+
+    spec: FigureSpec = FigureSpec(f"figs/peaks_{angle:.0f}deg.png",
+                                  f"$\\gamma$ energy and neutron induced ejectile energy from {sources_latex} at {angle:.0f} degree detector angle",
+                                  "Incoming $E_\\alpha$ [keV]", "$\\gamma$ or ejectile energy [keV]", legend_outside=True)
+
+    for reaction in gamma_reactions:
+        gammas: StageResult = graph.evaluate(reaction.tag)
+        for i, level in enumerate(reaction.levels):
+            spec.curves.append(CurveSpec(*gammas.curve((i, j)), linestyles[i % len(linestyles)], "red", reaction.latex(level), uncertainties[reaction.tag].band((i, j), band_sigma)))
+
+    for source in source_reactions:
+        for k, detector in enumerate(detector_reactions):
+            ejectiles: StageResult = graph.evaluate(chain_name(source, detector))
+            for l, detector_level in enumerate(detector.levels):
+                for i, level in enumerate(source.levels):
+                    spec.curves.append(CurveSpec(*ejectiles.curve((l, 0, i, j)), linestyles[i % len(linestyles)], detector_colors[k % len(detector_colors)], f"{detector.latex(detector_level)} {source.recoil_latex(level)}",
+                                                 uncertainties[chain_name(source, detector)].band((l, 0, i, j), band_sigma),
+                                                 curve_weight(graph, weights, chain_name(source, detector), (l, 0, i, j))))
+
+    return spec
+
+def figure_jobs(graph: ReactionGraph, cross_sections: CrossSectionLibrary, style: dict[str, dict]) -> list[BuildJob]:
+    # The key of each figure hashes the curves it draws (see curve_key and curve_weights_key) together with
+    # the plot style, so a changed level or angle only recomputes and renders the figures that show it
+    plot_style: tuple = (style, linestyles, colors, detector_colors, band_sigma)
+    window: tuple[float, float] = (float(graph.beam_energy[0]), float(graph.beam_energy[-1]))
+    jobs: list[BuildJob] = []
+
+    def curves_key(name: str, indices: list[tuple[int, ...]], weighted: bool = False) -> list:
+        return [(index, curve_key(graph, name, index), curve_weights_key(graph, name, index, cross_sections) if weighted else None) for index in indices]
+
+    def spectra_key(source: Reaction, levels: list[int]) -> tuple:
+        # angular_spectra depends on the levels and masses of the source and the beam window, not on the grid or the angles
+        reaction: Reaction = dataclasses.replace(source, levels=tuple(source.levels[i] for i in levels))
+        return (reaction, reaction.masses(graph.masses), window, map_angle_edges, map_bin_edges, neutron_legendre, map_beam_points)
+
+    # Mass uncertainty bands and intensity weights of all stages and the angle-integrated products of a source
+    # are evaluated once, on first use
+    uncertainties: dict[str, CurveUncertainty] = {}
+    def stage_uncertainties() -> dict[str, CurveUncertainty]:
+        if not uncertainties:
+            uncertainties.update(graph_uncertainties(graph))
+        return uncertainties
+
+    weights: dict[str, NDArray[np.float64]] = {}
+    def stage_weights() -> dict[str, NDArray[np.float64]]:
+        if not weights:
+            weights.update(graph_weights(graph, cross_sections))
+        return weights
+
+    angular: dict[str, AngularSpectra] = {}
+    def source_spectra(source: Reaction) -> AngularSpectra:
+        if source.tag not in angular:
+            angular[source.tag] = source_angular_spectra(graph, source)
+        return angular[source.tag]
+
+    angles: range = range(len(neutron_angles))
+    for reaction in gamma_reactions:
+        jobs.append(BuildJob(f"figs/{reaction.tag}.png", hash_inputs(plot_style, curves_key(reaction.tag, [(i, 0) for i in range(len(reaction.levels))])),
+                             lambda reaction=reaction: gamma_figure(graph, stage_uncertainties(), reaction)))
+
+    for source in source_reactions:
+        for i in range(len(source.levels)):
+            jobs.append(BuildJob(source_figure_filename(source, i), hash_inputs(plot_style, curves_key(source.tag, [(i, j) for j in angles])),
+                                 lambda source=source, i=i: source_figure(graph, stage_uncertainties(), source, i)))
+
+        jobs.append(BuildJob(f"figs/{source.tag}_spectra.png", hash_inputs(plot_style, spectra_key(source, list(range(len(source.levels))))),
+                             lambda source=source: spectra_figure(source_spectra(source))))
+        for i in range(len(source.levels)):
+            jobs.append(BuildJob(map_figure_filename(source, i), hash_inputs(plot_style, spectra_key(source, [i])),
+                                 lambda source=source, i=i: map_figure(source_spectra(source), i)))
+
+        for detector in detector_reactions:
+            for l in range(len(detector.levels)):
+                for i in range(len(source.levels)):
+                    jobs.append(BuildJob(chain_figure_filename(source, detector, i, l), hash_inputs(plot_style, curves_key(chain_name(source, detector), [(l, 0, i, j) for j in angles], True)),
+                                         lambda source=source, detector=detector, i=i, l=l: chain_figure(graph, stage_uncertainties(), stage_weights(), source, detector, i, l)))
+
+    for j, angle in enumerate(neutron_angles):
+        drawn: list = [curves_key(reaction.tag, [(i, j) for i in range(len(reaction.levels))]) for reaction in gamma_reactions]
+        drawn += [curves_key(chain_name(source, detector), [(l, 0, i, j) for l in range(len(detector.levels)) for i in range(len(source.levels))], True)
+                  for source in source_reactions for detector in detector_reactions]
+        jobs.append(BuildJob(f"figs/peaks_{angle:.0f}deg.png", hash_inputs(plot_style, drawn),
+                             lambda j=j: peaks_figure(graph, stage_uncertainties(), stage_weights(), j)))
+
+    return jobs
+
+def table_jobs(graph: ReactionGraph, cross_sections: CrossSectionLibrary) -> list[BuildJob]:
+    # Tables covering every stage are keyed like the peaks figures
+    all_stages: list[str] = [stage_key(graph, name) for name in graph.stages]
+    all_weights: list[str] = [weights_key(graph, name, cross_sections) for name in graph.stages]
+
+    return [
+        BuildJob("figs/peak_index.npz", hash_inputs(all_stages), lambda: PeakIndex.from_graph(graph).save("figs/peak_index.npz")),
+        BuildJob("figs/curves.npz", hash_inputs(all_stages, all_weights),
+                 lambda: export_curves(graph, "figs/curves.npz", graph_weights(graph, cross_sections))),
+    ]
+
+def cached_energy_grid(build_cache: BuildCache, nist_isotope_mass: NIST_isotope_mass, start: float, stop: float, filename: str = "figs/energy_grid.npy") -> NDArray[np.float64]:
+    # The bisection only depends on the reactions, their masses and the angles, not on anything drawn
+    reactions: tuple[Reaction, ...] = gamma_reactions + source_reactions + detector_reactions
+    key: str = hash_inputs(reactions, [reaction.masses(nist_isotope_mass) for reaction in reactions], neutron_angles, start, stop)
+    reason: str | None = build_cache.stale_reason(filename, key)
+    if reason is None:
+        return np.load(filename)
+
+    lab_energy: NDArray[np.float64] = build_energy_grid(nist_isotope_mass, start, stop)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    np.save(filename, lab_energy)
+    print(f"Regenerated {filename} ({reason})")
+    build_cache.record(filename, key, reason)
+    return lab_energy
 
-def eject_lab_energy(lab_energy: NDArray[np.float64], lab_angle: float, proj_mass: float, target_mass: float, eject_mass: float, recoil_mass: float, recoil_ex: float) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
-    lab_angle = np.deg2rad(lab_angle)
-    q_value: float = proj_mass + target_mass - eject_mass - recoil_mass - recoil_ex
+def main():
+    with span("main"):
+        with span("masses"):
+            nist_isotope_mass: NIST_isotope_mass = NIST_isotope_mass("data/nist_isotope_mass.txt")
 
-    enum1: NDArray[np.float64] = np.sqrt( (proj_mass * eject_mass) * lab_energy) * np.cos(lab_angle)
-    enum2: NDArray[np.float64] = np.sqrt( (proj_mass * eject_mass * np.power(np.cos(lab_angle), 2)) * lab_energy \
-                                         + (recoil_mass + eject_mass) * (recoil_mass * q_value + (recoil_mass - proj_mass) * lab_energy) )
-    
-    result_plus: NDArray[np.float64] = np.power((enum1 + enum2) / (recoil_mass + eject_mass), 2)
-    result_minus: NDArray[np.float64] = np.power((enum1 - enum2) / (recoil_mass + eject_mass), 2)
-    
-    return (result_plus, result_minus)
+        for reaction in gamma_reactions + source_reactions + detector_reactions:
+            print(f"{reaction.name} Q-value: {reaction.q_value(nist_isotope_mass) : .3f} keV")
 
-def gamma_energy(lab_energy: NDArray[np.float64], proj_mass: float, target_mass: float, recoil_mass: float, recoil_ex: float) -> NDArray[np.float64]:
-    q_value: float = proj_mass + target_mass - recoil_mass - recoil_ex
+        build_cache: BuildCache = BuildCache("figs/manifest.json")
+        with span("energy grid"):
+            lab_energy: NDArray[np.float64] = cached_energy_grid(build_cache, nist_isotope_mass, 4e3, 9e3)
 
-    momentum2: NDArray[np.float64] = (2 * proj_mass ) * lab_energy
+        with span("reaction graph", points=lab_energy.size):
+            graph: ReactionGraph = build_reaction_graph(nist_isotope_mass, lab_energy)
 
-    recoil_energy: NDArray[np.float64] = momentum2 / (2 * (recoil_mass + recoil_ex))
-    
-    return lab_energy + q_value - recoil_energy
+        cross_sections: CrossSectionLibrary = CrossSectionLibrary(cross_section_directory)
+        for channel in cross_sections.missing(detector_reactions):
+            print(f"No cross-section table for {channel} in {cross_sections.directory}, weighted by abundance only")
 
-def has_enough_energy(lab_energy: NDArray[np.float64], lab_angle: float, proj_mass: float, target_mass: float, eject_mass: float, recoil_mass: float, recoil_ex: float) -> list[bool]:
-    lab_angle = np.deg2rad(lab_angle)
-    q_value: float = proj_mass + target_mass - eject_mass - recoil_mass - recoil_ex
+        with span("figure specs"):
+            stale_jobs: list[tuple[BuildJob, str]] = build_cache.stale_jobs(figure_jobs(graph, cross_sections, default_style))
+            specs: list[FigureSpec] = [job.build() for job, reason in stale_jobs]
 
-    result: list[bool] = []
-    
-    for i in range(len(lab_energy)):
-        if q_value + lab_energy[i] <= 0:
-            result.append(False)
-            continue
+        with span("render", figures=len(specs)):
+            render_figures(specs, default_style)
 
-        enum2: float = (proj_mass * eject_mass * np.power(np.cos(lab_angle), 2)) * lab_energy[i] \
-                                         + (recoil_mass + eject_mass) * (recoil_mass * q_value + (recoil_mass - proj_mass) * lab_energy[i])
-        
-        if enum2 < 0:
-            result.append(False)
-            continue
+        for job, reason in stale_jobs:
+            print(f"Regenerated {job.output} ({reason})")
+            build_cache.record(job.output, job.key, reason)
 
-        result.append(True)
+        with span("tables"):
+            for job, reason in build_cache.stale_jobs(table_jobs(graph, cross_sections)):
+                with span(os.path.basename(job.output)):
+                    job.build()
+                print(f"Regenerated {job.output} ({reason})")
+                build_cache.record(job.output, job.key, reason)
 
-    return  result
-
-def main():
-    nist_isotope_mass: NIST_isotope_mass = NIST_isotope_mass("data/nist_isotope_mass.txt")
-    
-    neutron_mass: float = 939.5654133e3 # keV
-    H1_mass: float = nist_isotope_mass.get_isotope_mass("H", 1)
-    He4_mass: float = nist_isotope_mass.get_isotope_mass("He", 4)
-    C12_mass: float = nist_isotope_mass.get_isotope_mass("C", 12)
-    C13_mass: float = nist_isotope_mass.get_isotope_mass("C", 13)
-    O16_mass: float = nist_isotope_mass.get_isotope_mass("O", 16)
-    As76_mass: float = nist_isotope_mass.get_isotope_mass("As", 76)
-    As78_mass: float = nist_isotope_mass.get_isotope_mass("As", 78)
-    Se79_mass: float = nist_isotope_mass.get_isotope_mass("Se", 79)
-    Se81_mass: float = nist_isotope_mass.get_isotope_mass("Se", 81)
-    Br79_mass: float = nist_isotope_mass.get_isotope_mass("Br", 79)
-    Br81_mass: float = nist_isotope_mass.get_isotope_mass("Br", 81)
-
-    C12_a_g_O16_q_value: float = C12_mass + He4_mass - O16_mass
-    C13_a_n_O16_q_value: float = C13_mass + He4_mass - neutron_mass - O16_mass
-    Br79_n_p_Se79_q_value: float = Br79_mass + neutron_mass - H1_mass - Se79_mass
-    Br81_n_p_Se81_q_value: float = Br81_mass + neutron_mass - H1_mass - Se81_mass
-    Br79_n_a_As76_q_value: float = Br79_mass + neutron_mass - He4_mass - As76_mass
-    Br81_n_a_As78_q_value: float = Br81_mass + neutron_mass - He4_mass - As78_mass
-
-
-    print(f"12C(a,g)16O Q-value: {C12_a_g_O16_q_value : .3f} keV")
-    print(f"13C(a,n)16O Q-value: {C13_a_n_O16_q_value : .3f} keV")
-    print(f"79Br(n,p)79Se Q-value: {Br79_n_p_Se79_q_value : .3f} keV")
-    print(f"81Br(n,p)81Se Q-value {Br81_n_p_Se81_q_value : .3f} keV")
-    print(f"79Br(n,a)76As Q-value: {Br79_n_a_As76_q_value : .3f} keV")
-    print(f"81Br(n,a)78As Q-value: {Br81_n_a_As78_q_value : .3f} keV")
-
-    lab_energy: NDArray[np.float64] = np.linspace(4e3, 9e3, 1000, dtype=np.float64)
-
-    C12_a_g_O16_gs: NDArray[np.float64] = gamma_energy(lab_energy, He4_mass, C12_mass, O16_mass, 0)
-    C12_a_g_O16_6130: NDArray[np.float64] = gamma_energy(lab_energy, He4_mass, C12_mass, O16_mass, 6130)
-    C12_a_g_O16_6917: NDArray[np.float64] = gamma_energy(lab_energy, He4_mass, C12_mass, O16_mass, 6917)
-    C12_a_g_O16_7117: NDArray[np.float64] = gamma_energy(lab_energy, He4_mass, C12_mass, O16_mass, 7117)
-
-    plt.rc("font", family=["Helvetica", "Arial"])
-    plt.rc("text", usetex=True)
-    plt.rc("axes", labelsize=14, titlesize=14)
-    plt.rc("xtick", labelsize=14, top=True, direction="in")
-    plt.rc("ytick", labelsize=14, right=True, direction="in")
-    plt.rc("legend", fontsize=14)
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{12}$C$(\\alpha,\\gamma)^{16}$O (labels for final state)")
-    ax.set_ylabel("$E_{\\gamma}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy, C12_a_g_O16_gs, linestyle="-", color="black", label="$^{16}$O$(\\mathrm{g.s.})$")
-    ax.plot(lab_energy, C12_a_g_O16_6130, linestyle="--", color="red", label="$^{16}$O$(6130)$")
-    ax.plot(lab_energy, C12_a_g_O16_6917, linestyle="-.", color="blue", label="$^{16}$O$(6917)$")
-    ax.plot(lab_energy, C12_a_g_O16_7117, linestyle=":", color="green", label="$^{16}$O$(7117)$")
-    ax.legend()
-
-    fig.savefig("figs/C12_a_g_O16.png", bbox_inches="tight", dpi=400)
-
-    fig_45deg, ax_45deg = plt.subplots(1, 1, figsize=(9,7))
-    ax_45deg.set_title("$\\gamma$ energy and neutron induced ejectile energy from ${13}$C$(\\alpha,n)^{16}$O at 45 degree detector angle")
-    ax_45deg.set_ylabel("$\\gamma$ or ejectile energy [keV]")
-    ax_45deg.set_xlabel("Incoming $E_\\alpha$ [keV]")
-    ax_45deg.plot(lab_energy, C12_a_g_O16_gs, linestyle="-", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(\\mathrm{g.s.})$")
-    ax_45deg.plot(lab_energy, C12_a_g_O16_6130, linestyle="--", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(6130)$")
-    ax_45deg.plot(lab_energy, C12_a_g_O16_6917, linestyle="-.", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(6917)$")
-    ax_45deg.plot(lab_energy, C12_a_g_O16_7117, linestyle=":", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(7117)$")
-
-    fig_90deg, ax_90deg = plt.subplots(1, 1, figsize=(9,7))
-    ax_90deg.set_title("$\\gamma$ energy and neutron induced ejectile energy from ${13}$C$(\\alpha,n)^{16}$O at 90 degree detector angle")
-    ax_90deg.set_ylabel("$\\gamma$ or ejectile energy [keV]")
-    ax_90deg.set_xlabel("Incoming $E_\\alpha$ [keV]")
-    ax_90deg.plot(lab_energy, C12_a_g_O16_gs, linestyle="-", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(\\mathrm{g.s.})$")
-    ax_90deg.plot(lab_energy, C12_a_g_O16_6130, linestyle="--", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(6130)$")
-    ax_90deg.plot(lab_energy, C12_a_g_O16_6917, linestyle="-.", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(6917)$")
-    ax_90deg.plot(lab_energy, C12_a_g_O16_7117, linestyle=":", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(7117)$")
-
-    fig_135deg, ax_135deg = plt.subplots(1, 1, figsize=(9,7))
-    ax_135deg.set_title("$\\gamma$ energy and neutron induced ejectile energy from ${13}$C$(\\alpha,n)^{16}$O at 135 degree detector angle")
-    ax_135deg.set_ylabel("$\\gamma$ or ejectile energy [keV]")
-    ax_135deg.set_xlabel("Incoming $E_\\alpha$ [keV]")
-    ax_135deg.plot(lab_energy, C12_a_g_O16_gs, linestyle="-", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(\\mathrm{g.s.})$")
-    ax_135deg.plot(lab_energy, C12_a_g_O16_6130, linestyle="--", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(6130)$")
-    ax_135deg.plot(lab_energy, C12_a_g_O16_6917, linestyle="-.", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(6917)$")
-    ax_135deg.plot(lab_energy, C12_a_g_O16_7117, linestyle=":", color="red", label="$^{12}$C$(\\alpha,\\gamma)^{16}$O$(7117)$")
-
-    ################
-    ################
-    # C13_a_n_O16_gs
-
-    C13_a_n_O16_gs_45deg: NDArray[np.float64] = eject_lab_energy(lab_energy, 45, He4_mass, C13_mass, neutron_mass, O16_mass, 0)[0]
-    C13_a_n_O16_gs_90deg: NDArray[np.float64] = eject_lab_energy(lab_energy, 90, He4_mass, C13_mass, neutron_mass, O16_mass, 0)[0]
-    C13_a_n_O16_gs_135deg: NDArray[np.float64] = eject_lab_energy(lab_energy, 135, He4_mass, C13_mass, neutron_mass, O16_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(\\mathrm{g.s.})$")
-    ax.set_ylabel("$E_{n}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy, C13_a_n_O16_gs_45deg, linestyle="-", color="black", label="$\\theta_\\mathrm{LAB}=45\\,$deg")
-    ax.plot(lab_energy, C13_a_n_O16_gs_90deg, linestyle="--", color="red", label="$\\theta_\\mathrm{LAB}=90\\,$deg")
-    ax.plot(lab_energy, C13_a_n_O16_gs_135deg, linestyle="-.", color="blue", label="$\\theta_\\mathrm{LAB}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_g_O16_gs.png", bbox_inches="tight", dpi=400)
-
-    Br79_n_p_Se79_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_45deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-    Br79_n_p_Se79_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_90deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-    Br79_n_p_Se79_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_135deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(\\mathrm{g.s.})$ to $^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $\\theta_p=0\\,$deg")
-    ax.set_ylabel("$E_{p}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy, Br79_n_p_Se79_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy, Br79_n_p_Se79_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy, Br79_n_p_Se79_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_gs_Br79_n_p_Se79.png", bbox_inches="tight", dpi=400)
-
-    Br81_n_p_Se81_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_45deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-    Br81_n_p_Se81_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_90deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-    Br81_n_p_Se81_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_135deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(\\mathrm{g.s.})$ to $^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $\\theta_p=0\\,$deg")
-    ax.set_ylabel("$E_{p}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy, Br81_n_p_Se81_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy, Br81_n_p_Se81_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy, Br81_n_p_Se81_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_gs_Br81_n_p_Se81.png", bbox_inches="tight", dpi=400)
-    
-
-    Br79_n_a_As76_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_45deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-    Br79_n_a_As76_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_90deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-    Br79_n_a_As76_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_135deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(\\mathrm{g.s.})$ to $^{79}$Br$(n,a)^{76}$As$(\\mathrm{g.s.})$ $\\theta_\\alpha=0\\,$deg")
-    ax.set_ylabel("$E_{\\alpha}$ [keV]")
-    ax.set_xlabel("Incoming $E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy, Br79_n_a_As76_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy, Br79_n_a_As76_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy, Br79_n_a_As76_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_gs_Br79_n_a_As76.png", bbox_inches="tight", dpi=400)
-
-    Br81_n_a_As78_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_45deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-    Br81_n_a_As78_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_90deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-    Br81_n_a_As78_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_gs_135deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(\\mathrm{g.s.})$ to $^{81}$Br$(n,a)^{78}$As$(\\mathrm{g.s.})$ $\\theta_\\alpha=0\\,$deg")
-    ax.set_ylabel("$E_{\\alpha}$ [keV]")
-    ax.set_xlabel("Incoming $E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy, Br81_n_a_As78_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy, Br81_n_a_As78_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy, Br81_n_a_As78_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_gs_Br81_n_a_As78.png", bbox_inches="tight", dpi=400)
-
-    ax_45deg.plot(lab_energy, Br79_n_p_Se79_gs_45deg, linestyle="-", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_45deg.plot(lab_energy, Br81_n_p_Se81_gs_45deg, linestyle="-", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_45deg.plot(lab_energy, Br79_n_a_As76_gs_45deg, linestyle="-", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_45deg.plot(lab_energy, Br81_n_a_As78_gs_45deg, linestyle="-", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-
-    ax_90deg.plot(lab_energy, Br79_n_p_Se79_gs_90deg, linestyle="-", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_90deg.plot(lab_energy, Br81_n_p_Se81_gs_90deg, linestyle="-", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_90deg.plot(lab_energy, Br79_n_a_As76_gs_90deg, linestyle="-", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_90deg.plot(lab_energy, Br81_n_a_As78_gs_90deg, linestyle="-", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-
-    ax_135deg.plot(lab_energy, Br79_n_p_Se79_gs_135deg, linestyle="-", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_135deg.plot(lab_energy, Br81_n_p_Se81_gs_135deg, linestyle="-", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_135deg.plot(lab_energy, Br79_n_a_As76_gs_135deg, linestyle="-", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-    ax_135deg.plot(lab_energy, Br81_n_a_As78_gs_135deg, linestyle="-", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(\\mathrm{g.s.})$")
-
-    ################
-    ################
-    # C13_a_n_O16_6130
-
-    C13_a_n_O16_6130_45deg_valid: list[bool] = has_enough_energy(lab_energy, 45, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)
-    C13_a_n_O16_6130_90deg_valid: list[bool] = has_enough_energy(lab_energy, 90, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)
-    C13_a_n_O16_6130_135deg_valid: list[bool] = has_enough_energy(lab_energy, 135, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)
-
-    C13_a_n_O16_6130_45deg: NDArray[np.float64] = eject_lab_energy(lab_energy[C13_a_n_O16_6130_45deg_valid], 45, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)[0]
-    C13_a_n_O16_6130_90deg: NDArray[np.float64] = eject_lab_energy(lab_energy[C13_a_n_O16_6130_90deg_valid], 90, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)[0]
-    C13_a_n_O16_6130_135deg: NDArray[np.float64] = eject_lab_energy(lab_energy[C13_a_n_O16_6130_135deg_valid], 135, He4_mass, C13_mass, neutron_mass, O16_mass, 6130)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6130)$")
-    ax.set_ylabel("$E_{n}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6130_45deg_valid], C13_a_n_O16_6130_45deg, linestyle="-", color="black", label="$\\theta_\\mathrm{LAB}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_90deg_valid], C13_a_n_O16_6130_90deg, linestyle="--", color="red", label="$\\theta_\\mathrm{LAB}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_135deg_valid], C13_a_n_O16_6130_135deg, linestyle="-.", color="blue", label="$\\theta_\\mathrm{LAB}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_g_O16_6130.png", bbox_inches="tight", dpi=400)
-
-    Br79_n_p_Se79_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_45deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)
-    Br79_n_p_Se79_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_90deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)
-    Br79_n_p_Se79_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_135deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)
-
-    Br79_n_p_Se79_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_45deg[Br79_n_p_Se79_gs_45deg_valid], 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-    Br79_n_p_Se79_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_90deg[Br79_n_p_Se79_gs_90deg_valid], 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-    Br79_n_p_Se79_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_135deg[Br79_n_p_Se79_gs_135deg_valid], 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6130)$ to $^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $\\theta_p=0\\,$deg")
-    ax.set_ylabel("$E_{p}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br79_n_p_Se79_gs_45deg_valid], Br79_n_p_Se79_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br79_n_p_Se79_gs_90deg_valid], Br79_n_p_Se79_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br79_n_p_Se79_gs_135deg_valid], Br79_n_p_Se79_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_6130_Br79_n_p_Se79.png", bbox_inches="tight", dpi=400)
-
-    Br81_n_p_Se81_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_45deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)
-    Br81_n_p_Se81_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_90deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)
-    Br81_n_p_Se81_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_135deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)
-
-    Br81_n_p_Se81_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_45deg[Br81_n_p_Se81_gs_45deg_valid], 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-    Br81_n_p_Se81_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_90deg[Br81_n_p_Se81_gs_90deg_valid], 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-    Br81_n_p_Se81_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_135deg[Br81_n_p_Se81_gs_135deg_valid], 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6130)$ to $^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $\\theta_p=0\\,$deg")
-    ax.set_ylabel("$E_{p}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br81_n_p_Se81_gs_45deg_valid], Br81_n_p_Se81_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br81_n_p_Se81_gs_90deg_valid], Br81_n_p_Se81_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br81_n_p_Se81_gs_135deg_valid], Br81_n_p_Se81_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_6130_Br81_n_p_Se81.png", bbox_inches="tight", dpi=400)
-
-    Br79_n_a_As76_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_45deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)
-    Br79_n_a_As76_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_90deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)
-    Br79_n_a_As76_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_135deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)
-
-    Br79_n_a_As76_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_45deg[Br79_n_a_As76_gs_45deg_valid], 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-    Br79_n_a_As76_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_90deg[Br79_n_a_As76_gs_90deg_valid], 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-    Br79_n_a_As76_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_135deg[Br79_n_a_As76_gs_135deg_valid], 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6130)$ to $^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $\\theta_\\alpha=0\\,$deg")
-    ax.set_ylabel("$E_{\\alpha}$ [keV]")
-    ax.set_xlabel("Incoming $E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br79_n_a_As76_gs_45deg_valid], Br79_n_a_As76_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br79_n_a_As76_gs_90deg_valid], Br79_n_a_As76_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br79_n_a_As76_gs_135deg_valid], Br79_n_a_As76_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_6130_Br79_n_a_As76.png", bbox_inches="tight", dpi=400)
-
-    Br81_n_a_As78_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_45deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)
-    Br81_n_a_As78_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_90deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)
-    Br81_n_a_As78_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6130_135deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)
-
-    Br81_n_a_As78_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_45deg[Br81_n_a_As78_gs_45deg_valid], 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-    Br81_n_a_As78_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_90deg[Br81_n_a_As78_gs_90deg_valid], 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-    Br81_n_a_As78_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6130_135deg[Br81_n_a_As78_gs_135deg_valid], 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6130)$ to $^{81}$Br$(n,\\alpha)^{81}$Se$(\\mathrm{g.s.})$ $\\theta_\\alpha=0\\,$deg")
-    ax.set_ylabel("$E_{\\alpha}$ [keV]")
-    ax.set_xlabel("Incoming $E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br81_n_a_As78_gs_45deg_valid], Br81_n_a_As78_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br81_n_a_As78_gs_90deg_valid], Br81_n_a_As78_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br81_n_a_As78_gs_135deg_valid], Br81_n_a_As78_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend() 
-
-    fig.savefig("figs/C13_a_n_O16_6130_Br81_n_a_As78.png", bbox_inches="tight", dpi=400)
-
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br79_n_p_Se79_gs_45deg_valid], Br79_n_p_Se79_gs_45deg, linestyle="--", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br81_n_p_Se81_gs_45deg_valid], Br81_n_p_Se81_gs_45deg, linestyle="--", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br79_n_a_As76_gs_45deg_valid], Br79_n_a_As76_gs_45deg, linestyle="--", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6130_45deg_valid][Br81_n_a_As78_gs_45deg_valid], Br81_n_a_As78_gs_45deg, linestyle="--", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br79_n_p_Se79_gs_90deg_valid], Br79_n_p_Se79_gs_90deg, linestyle="--", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br81_n_p_Se81_gs_90deg_valid], Br81_n_p_Se81_gs_90deg, linestyle="--", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br79_n_a_As76_gs_90deg_valid], Br79_n_a_As76_gs_90deg, linestyle="--", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6130_90deg_valid][Br81_n_a_As78_gs_90deg_valid], Br81_n_a_As78_gs_90deg, linestyle="--", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br79_n_p_Se79_gs_135deg_valid], Br79_n_p_Se79_gs_135deg, linestyle="--", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br81_n_p_Se81_gs_135deg_valid], Br81_n_p_Se81_gs_135deg, linestyle="--", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br79_n_a_As76_gs_135deg_valid], Br79_n_a_As76_gs_135deg, linestyle="--", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6130_135deg_valid][Br81_n_a_As78_gs_135deg_valid], Br81_n_a_As78_gs_135deg, linestyle="--", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(6130)$")
-
-
-
-    ################
-    ################
-    # C13_a_n_O16_6917
-
-    C13_a_n_O16_6917_45deg_valid: list[bool] = has_enough_energy(lab_energy, 45, He4_mass, C13_mass, neutron_mass, O16_mass, 6917)
-    C13_a_n_O16_6917_90deg_valid: list[bool] = has_enough_energy(lab_energy, 90, He4_mass, C13_mass, neutron_mass, O16_mass, 6917)
-    C13_a_n_O16_6917_135deg_valid: list[bool] = has_enough_energy(lab_energy, 135, He4_mass, C13_mass, neutron_mass, O16_mass, 6917)
-
-    C13_a_n_O16_6917_45deg: NDArray[np.float64] = eject_lab_energy(lab_energy[C13_a_n_O16_6917_45deg_valid], 45, He4_mass, C13_mass, neutron_mass, O16_mass, 6917)[0]
-    C13_a_n_O16_6917_90deg: NDArray[np.float64] = eject_lab_energy(lab_energy[C13_a_n_O16_6917_90deg_valid], 90, He4_mass, C13_mass, neutron_mass, O16_mass, 6917)[0]
-    C13_a_n_O16_6917_135deg: NDArray[np.float64] = eject_lab_energy(lab_energy[C13_a_n_O16_6917_135deg_valid], 135, He4_mass, C13_mass, neutron_mass, O16_mass, 6917)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6917)$")
-    ax.set_ylabel("$E_{n}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6917_45deg_valid], C13_a_n_O16_6917_45deg, linestyle="-", color="black", label="$\\theta_\\mathrm{LAB}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_90deg_valid], C13_a_n_O16_6917_90deg, linestyle="--", color="red", label="$\\theta_\\mathrm{LAB}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_135deg_valid], C13_a_n_O16_6917_135deg, linestyle="-.", color="blue", label="$\\theta_\\mathrm{LAB}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_g_O16_6917.png", bbox_inches="tight", dpi=400)
-
-    Br79_n_p_Se79_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_45deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)
-    Br79_n_p_Se79_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_90deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)
-    Br79_n_p_Se79_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_135deg, 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)
-
-    Br79_n_p_Se79_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_45deg[Br79_n_p_Se79_gs_45deg_valid], 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-    Br79_n_p_Se79_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_90deg[Br79_n_p_Se79_gs_90deg_valid], 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-    Br79_n_p_Se79_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_135deg[Br79_n_p_Se79_gs_135deg_valid], 0, neutron_mass, Br79_mass, H1_mass, Se79_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6917)$ to $^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $\\theta_p=0\\,$deg")
-    ax.set_ylabel("$E_{p}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br79_n_p_Se79_gs_45deg_valid], Br79_n_p_Se79_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br79_n_p_Se79_gs_90deg_valid], Br79_n_p_Se79_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br79_n_p_Se79_gs_135deg_valid], Br79_n_p_Se79_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_6917_Br79_n_p_Se79.png", bbox_inches="tight", dpi=400)
-
-    Br81_n_p_Se81_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_45deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)
-    Br81_n_p_Se81_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_90deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)
-    Br81_n_p_Se81_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_135deg, 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)
-
-    Br81_n_p_Se81_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_45deg[Br81_n_p_Se81_gs_45deg_valid], 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-    Br81_n_p_Se81_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_90deg[Br81_n_p_Se81_gs_90deg_valid], 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-    Br81_n_p_Se81_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_135deg[Br81_n_p_Se81_gs_135deg_valid], 0, neutron_mass, Br81_mass, H1_mass, Se81_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6917)$ to $^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $\\theta_p=0\\,$deg")
-    ax.set_ylabel("$E_{p}$ [keV]")
-    ax.set_xlabel("$E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br81_n_p_Se81_gs_45deg_valid], Br81_n_p_Se81_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br81_n_p_Se81_gs_90deg_valid], Br81_n_p_Se81_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br81_n_p_Se81_gs_135deg_valid], Br81_n_p_Se81_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_6917_Br81_n_p_Se81.png", bbox_inches="tight", dpi=400)
-
-    Br79_n_a_As76_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_45deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)
-    Br79_n_a_As76_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_90deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)
-    Br79_n_a_As76_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_135deg, 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)
-
-    Br79_n_a_As76_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_45deg[Br79_n_a_As76_gs_45deg_valid], 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-    Br79_n_a_As76_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_90deg[Br79_n_a_As76_gs_90deg_valid], 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-    Br79_n_a_As76_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_135deg[Br79_n_a_As76_gs_135deg_valid], 0, neutron_mass, Br79_mass, He4_mass, As76_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6917)$ to $^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $\\theta_\\alpha=0\\,$deg")
-    ax.set_ylabel("$E_{\\alpha}$ [keV]")
-    ax.set_xlabel("Incoming $E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br79_n_a_As76_gs_45deg_valid], Br79_n_a_As76_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br79_n_a_As76_gs_90deg_valid], Br79_n_a_As76_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br79_n_a_As76_gs_135deg_valid], Br79_n_a_As76_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend()
-
-    fig.savefig("figs/C13_a_n_O16_6917_Br79_n_a_As76.png", bbox_inches="tight", dpi=400)
-
-    Br81_n_a_As78_gs_45deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_45deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)
-    Br81_n_a_As78_gs_90deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_90deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)
-    Br81_n_a_As78_gs_135deg_valid: list[bool] = has_enough_energy(C13_a_n_O16_6917_135deg, 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)
-
-    Br81_n_a_As78_gs_45deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_45deg[Br81_n_a_As78_gs_45deg_valid], 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-    Br81_n_a_As78_gs_90deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_90deg[Br81_n_a_As78_gs_90deg_valid], 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-    Br81_n_a_As78_gs_135deg: NDArray[np.float64] = eject_lab_energy(C13_a_n_O16_6917_135deg[Br81_n_a_As78_gs_135deg_valid], 0, neutron_mass, Br81_mass, He4_mass, As78_mass, 0)[0]
-
-    fig, ax = plt.subplots(1, 1, figsize=(9,7))
-    ax.set_title("$^{13}$C$(\\alpha,n)^{16}$O$(6917)$ to $^{81}$Br$(n,\\alpha)^{81}$Se$(\\mathrm{g.s.})$ $\\theta_\\alpha=0\\,$deg")
-    ax.set_ylabel("$E_{\\alpha}$ [keV]")
-    ax.set_xlabel("Incoming $E_{\\alpha}$ [keV]")
-    ax.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br81_n_a_As78_gs_45deg_valid], Br81_n_a_As78_gs_45deg, linestyle="-", color="black", label="$\\theta_{n,\\mathrm{LAB}}=45\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br81_n_a_As78_gs_90deg_valid], Br81_n_a_As78_gs_90deg, linestyle="--", color="red", label="$\\theta_{n,\\mathrm{LAB}}=90\\,$deg")
-    ax.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br81_n_a_As78_gs_135deg_valid], Br81_n_a_As78_gs_135deg, linestyle="-.", color="blue", label="$\\theta_{n,\\mathrm{LAB}}=135\\,$deg")
-    ax.legend() 
-
-    fig.savefig("figs/C13_a_n_O16_6917_Br81_n_a_As78.png", bbox_inches="tight", dpi=400)
-
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br79_n_p_Se79_gs_45deg_valid], Br79_n_p_Se79_gs_45deg, linestyle="-.", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br81_n_p_Se81_gs_45deg_valid], Br81_n_p_Se81_gs_45deg, linestyle="-.", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br79_n_a_As76_gs_45deg_valid], Br79_n_a_As76_gs_45deg, linestyle="-.", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_45deg.plot(lab_energy[C13_a_n_O16_6917_45deg_valid][Br81_n_a_As78_gs_45deg_valid], Br81_n_a_As78_gs_45deg, linestyle="-.", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br79_n_p_Se79_gs_90deg_valid], Br79_n_p_Se79_gs_90deg, linestyle="-.", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br81_n_p_Se81_gs_90deg_valid], Br81_n_p_Se81_gs_90deg, linestyle="-.", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br79_n_a_As76_gs_90deg_valid], Br79_n_a_As76_gs_90deg, linestyle="-.", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_90deg.plot(lab_energy[C13_a_n_O16_6917_90deg_valid][Br81_n_a_As78_gs_90deg_valid], Br81_n_a_As78_gs_90deg, linestyle="-.", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br79_n_p_Se79_gs_135deg_valid], Br79_n_p_Se79_gs_135deg, linestyle="-.", color="black", label="$^{79}$Br$(n,p)^{79}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br81_n_p_Se81_gs_135deg_valid], Br81_n_p_Se81_gs_135deg, linestyle="-.", color="blue", label="$^{81}$Br$(n,p)^{81}$Se$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br79_n_a_As76_gs_135deg_valid], Br79_n_a_As76_gs_135deg, linestyle="-.", color="green", label="$^{79}$Br$(n,\\alpha)^{76}$As$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-    ax_135deg.plot(lab_energy[C13_a_n_O16_6917_135deg_valid][Br81_n_a_As78_gs_135deg_valid], Br81_n_a_As78_gs_135deg, linestyle="-.", color="cyan", label="$^{81}$Br$(n,\\alpha)^{78}$As$(\\mathrm{g.s.})$ $^{16}$O$(6917)$")
-
-    ax_45deg.legend(bbox_to_anchor=(1.04, 1), loc="upper left")
-    ax_90deg.legend(bbox_to_anchor=(1.04, 1), loc="upper left")
-    ax_135deg.legend(bbox_to_anchor=(1.04, 1), loc="upper left")
-
-    fig_45deg.savefig("figs/peaks_45deg.png", bbox_inches="tight", dpi=400)
-    fig_90deg.savefig("figs/peaks_90deg.png", bbox_inches="tight", dpi=400)
-    fig_135deg.savefig("figs/peaks_135deg.png", bbox_inches="tight", dpi=400)
+        build_cache.save()
 
     return
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Compute the reaction kinematics and render the figures")
+    parser.add_argument("--profile", action="store_true", help="print a per-stage timing report")
+    parser.add_argument("--profile-memory", action="store_true", help="also record peak traced memory per stage (slower)")
+    parser.add_argument("--trace", help="write the stage timings to this Chrome trace JSON file")
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.profile or args.profile_memory or args.trace is not None:
+        instrumentation.enable(track_memory=args.profile_memory)
+
+    main()
+
+    if args.profile or args.profile_memory:
+        print(instrumentation.report())
+    if args.trace is not None:
+        instrumentation.write_chrome_trace(args.trace)
@@ -0,0 +1,173 @@
+import argparse
+
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+from reactions import ReactionGraph, Stage, StageResult, level_label
+
+from numpy.typing import NDArray
+
+@dataclass
+class PeakHypothesis:
+    stage: str
+    label: str
+    levels: tuple[float, ...]  # recoil level of each stage, outermost stage first
+    angles: tuple[float, ...]  # ejectile lab angle of each stage, outermost stage first
+    beam_energy: float         # keV
+    energy: float              # predicted peak energy closest to the query [keV]
+    distance: float            # |energy - query| [keV]
+
+def stage_chain(graph: ReactionGraph, name: str) -> list[Stage]:
+    chain: list[Stage] = [graph.stages[name]]
+    while chain[-1].source is not None:
+        chain.append(graph.stages[chain[-1].source])
+    return chain
+
+def curve_label(chain: list[Stage], levels: NDArray[np.float64], angles: NDArray[np.float64]) -> str:
+    return " <- ".join(f"{stage.reaction.name}({level_label(level)}) {angle:g} deg" for stage, level, angle in zip(chain, levels, angles))
+
+class CurveMetadata(NamedTuple):
+    chain: list[Stage]
+    levels: NDArray[np.float64] # (curve, depth), recoil level of each stage, outermost stage first, NaN past the chain
+    angles: NDArray[np.float64] # (curve, depth), ejectile lab angle of each stage
+    labels: list[str]
+
+def curve_metadata(graph: ReactionGraph, name: str, depth: int) -> CurveMetadata:
+    # One row per curve of the stage, in the order of its result flattened over all but the beam axis
+    result: StageResult = graph.evaluate(name)
+    chain: list[Stage] = stage_chain(graph, name)
+    curves_shape: tuple[int, ...] = result.energy.shape[:-1]
+
+    # Axes of a stage result are (level, angle) per stage, outermost stage first
+    indices: NDArray[np.intp] = np.indices(curves_shape).reshape(len(curves_shape), -1)
+    levels: NDArray[np.float64] = np.full((indices.shape[1], depth), np.nan)
+    angles: NDArray[np.float64] = np.full((indices.shape[1], depth), np.nan)
+    for k, stage in enumerate(chain):
+        levels[:, k] = np.asarray(stage.reaction.levels)[indices[2 * k]]
+        angles[:, k] = np.asarray(stage.angles)[indices[2 * k + 1]]
+
+    return CurveMetadata(chain, levels, angles, [curve_label(chain, levels[i], angles[i]) for i in range(indices.shape[1])])
+
+class PeakIndex:
+    # Every curve is stored as its straight segments between neighbouring beam energies. Segments are
+    # bucketed by the power of two of their energy span; inside a bucket they are sorted by lower edge,
+    # so a query is one binary search per bucket plus the matches.
+    min_span: float = 1. # keV
+
+    def __init__(self, arrays: dict[str, NDArray]):
+        self._arrays: dict[str, NDArray] = arrays
+
+    @classmethod
+    def from_graph(cls, graph: ReactionGraph) -> "PeakIndex":
+        curve_stage: list[str] = []
+        curve_labels: list[str] = []
+        curve_levels: list[NDArray[np.float64]] = []
+        curve_angles: list[NDArray[np.float64]] = []
+        segments: list[tuple[NDArray, ...]] = []
+        depth: int = max(len(stage_chain(graph, name)) for name in graph.stages)
+
+        for name in graph.stages:
+            result: StageResult = graph.evaluate(name)
+            metadata: CurveMetadata = curve_metadata(graph, name, depth)
+            energy: NDArray[np.float64] = result.energy.reshape(-1, result.energy.shape[-1])
+
+            first_curve: int = len(curve_labels)
+            curve_stage.extend([name] * energy.shape[0])
+            curve_labels.extend(metadata.labels)
+            curve_levels.append(metadata.levels)
+            curve_angles.append(metadata.angles)
+
+            beam_energy: NDArray[np.float64] = np.broadcast_to(result.beam_energy, energy.shape)
+            both_valid: NDArray[np.bool_] = ~np.isnan(energy[:, :-1]) & ~np.isnan(energy[:, 1:])
+            curve, point = np.nonzero(both_valid)
+            segments.append((curve + first_curve, beam_energy[curve, point], beam_energy[curve, point + 1], energy[curve, point], energy[curve, point + 1]))
+
+        segment_curve, x0, x1, y0, y1 = (np.concatenate(column) for column in zip(*segments))
+        low: NDArray[np.float64] = np.minimum(y0, y1)
+        high: NDArray[np.float64] = np.maximum(y0, y1)
+        bucket: NDArray[np.int64] = np.ceil(np.log2(np.maximum(high - low, cls.min_span) / cls.min_span)).astype(np.int64)
+
+        order: NDArray[np.intp] = np.lexsort((low, bucket))
+        bucket_ids, bucket_starts = np.unique(bucket[order], return_index=True)
+
+        return cls({
+            "curve_stage": np.array(curve_stage),
+            "curve_label": np.array(curve_labels),
+            "curve_levels": np.concatenate(curve_levels),
+            "curve_angles": np.concatenate(curve_angles),
+            "segment_curve": segment_curve[order],
+            "x0": x0[order],
+            "x1": x1[order],
+            "y0": y0[order],
+            "y1": y1[order],
+            "low": low[order],
+            "high": high[order],
+            "bucket_ids": bucket_ids,
+            "bucket_starts": np.append(bucket_starts, order.size),
+        })
+
+    def save(self, filename: str) -> None:
+        np.savez(filename, **self._arrays)
+
+    @classmethod
+    def load(cls, filename: str) -> "PeakIndex":
+        with np.load(filename) as f:
+            return cls({key: f[key] for key in f.files})
+
+    def query(self, energy: float, tolerance: float) -> list[PeakHypothesis]:
+        a: dict[str, NDArray] = self._arrays
+        query_low: float = energy - tolerance
+        query_high: float = energy + tolerance
+
+        candidates: list[NDArray[np.intp]] = []
+        for bucket, start, stop in zip(a["bucket_ids"], a["bucket_starts"][:-1], a["bucket_starts"][1:]):
+            max_span: float = self.min_span * 2.**bucket
+            first: int = start + int(np.searchsorted(a["low"][start:stop], query_low - max_span, side="left"))
+            last: int = start + int(np.searchsorted(a["low"][start:stop], query_high, side="right"))
+            window: NDArray[np.intp] = np.arange(first, last)
+            candidates.append(window[a["high"][first:last] >= query_low])
+
+        matches: NDArray[np.intp] = np.concatenate(candidates) if candidates else np.zeros(0, dtype=np.intp)
+        if matches.size == 0:
+            return []
+
+        # Closest point of each segment to the query, interpolated in beam energy
+        y0, y1 = a["y0"][matches], a["y1"][matches]
+        x0, x1 = a["x0"][matches], a["x1"][matches]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t: NDArray[np.float64] = np.clip(np.where(y1 != y0, (energy - y0) / (y1 - y0), 0.), 0., 1.)
+        closest: NDArray[np.float64] = y0 + t * (y1 - y0)
+        beam_energy: NDArray[np.float64] = x0 + t * (x1 - x0)
+        distance: NDArray[np.float64] = np.abs(closest - energy)
+
+        # One hypothesis per curve, the best segment wins; sorted by distance
+        curves: NDArray[np.intp] = a["segment_curve"][matches]
+        order: NDArray[np.intp] = np.lexsort((distance, curves))
+        first_of_curve: NDArray[np.bool_] = np.r_[True, curves[order][1:] != curves[order][:-1]]
+        best: NDArray[np.intp] = order[first_of_curve]
+        best = best[np.argsort(distance[best], kind="stable")]
+
+        hypotheses: list[PeakHypothesis] = []
+        for i in best:
+            curve: int = int(curves[i])
+            levels: NDArray[np.float64] = a["curve_levels"][curve]
+            angles: NDArray[np.float64] = a["curve_angles"][curve]
+            hypotheses.append(PeakHypothesis(str(a["curve_stage"][curve]), str(a["curve_label"][curve]),
+                                             tuple(levels[~np.isnan(levels)].tolist()), tuple(angles[~np.isnan(angles)].tolist()),
+                                             float(beam_energy[i]), float(closest[i]), float(distance[i])))
+        return hypotheses
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Find the reactions that can produce a peak at the given energy")
+    parser.add_argument("index", help="peak index written by main.py")
+    parser.add_argument("energy", type=float, nargs="+", help="peak energy [keV]")
+    parser.add_argument("--tolerance", type=float, default=20., help="[keV]")
+    args: argparse.Namespace = parser.parse_args()
+
+    index: PeakIndex = PeakIndex.load(args.index)
+    for energy in args.energy:
+        print(f"{energy:g} keV:")
+        for hypothesis in index.query(energy, args.tolerance):
+            print(f"  {hypothesis.energy:10.2f} keV  E_beam {hypothesis.beam_energy:8.1f} keV  {hypothesis.label}")
@@ -0,0 +1,249 @@
+import re
+
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import EjectKinematics, KinematicThresholds, eject_kinematics, gamma_energy, kinematic_thresholds
+from instrumentation import span
+
+from numpy.typing import ArrayLike, NDArray
+
+neutron_mass: float = 939.5654133e3 # keV
+neutron_mass_uncertainty: float = 5.8e-3 # keV, CODATA 2014
+
+light_particles: dict[str, tuple[str, int]] = {
+    "p": ("H", 1),
+    "d": ("H", 2),
+    "t": ("H", 3),
+    "h": ("He", 3),
+    "a": ("He", 4),
+}
+
+light_particles_latex: dict[str, str] = {
+    "n": "n",
+    "g": "\\gamma",
+    "p": "p",
+    "d": "d",
+    "t": "t",
+    "h": "^{3}\\mathrm{He}",
+    "a": "\\alpha",
+}
+
+_nuclide_pattern: re.Pattern = re.compile(r"^(\d+)([A-Z][a-z]?)$")
+_reaction_pattern: re.Pattern = re.compile(r"^\s*(\w+)\s*\(\s*(\w+)\s*,\s*(\w+)\s*\)\s*(\w+)\s*$")
+
+def parse_nuclide(nuclide: str) -> tuple[str, int]:
+    if nuclide in light_particles:
+        return light_particles[nuclide]
+
+    match: re.Match | None = _nuclide_pattern.match(nuclide)
+    if match is None:
+        raise ValueError(f"Cannot parse nuclide '{nuclide}'")
+
+    return (match.group(2), int(match.group(1)))
+
+def mass_number(nuclide: str) -> int:
+    if nuclide == "g":
+        return 0
+    if nuclide == "n":
+        return 1
+    return parse_nuclide(nuclide)[1]
+
+def nuclide_mass(masses: NIST_isotope_mass, nuclide: str) -> float:
+    if nuclide == "g":
+        return 0.
+    if nuclide == "n":
+        return neutron_mass
+
+    symbol, A = parse_nuclide(nuclide)
+    return masses.get_isotope_mass(symbol, A)
+
+def nuclide_mass_uncertainty(masses: NIST_isotope_mass, nuclide: str) -> float:
+    if nuclide == "g":
+        return 0.
+    if nuclide == "n":
+        return neutron_mass_uncertainty
+
+    symbol, A = parse_nuclide(nuclide)
+    return masses.get_isotope_mass_uncertainty(symbol, A)
+
+def nuclide_abundance(masses: NIST_isotope_mass, nuclide: str) -> float:
+    symbol, A = parse_nuclide(nuclide)
+    return masses.get_isotope_abundance(symbol, A)
+
+def level_label(level: float) -> str:
+    return "gs" if level == 0 else f"{level:.0f}"
+
+def level_latex(level: float) -> str:
+    return "$(\\mathrm{g.s.})$" if level == 0 else f"$({level:.0f})$"
+
+@dataclass(frozen=True)
+class Reaction:
+    target: str
+    projectile: str
+    ejectile: str
+    recoil: str
+    levels: tuple[float, ...] = (0.,)
+
+    @classmethod
+    def from_string(cls, reaction: str, levels: tuple[float, ...] = (0.,)) -> "Reaction":
+        # "13C(a,n)16O" -> Reaction("13C", "a", "n", "16O")
+        match: re.Match | None = _reaction_pattern.match(reaction)
+        if match is None:
+            raise ValueError(f"Cannot parse reaction '{reaction}', expected e.g. '13C(a,n)16O'")
+
+        target, projectile, ejectile, recoil = match.groups()
+        for particle in (projectile, ejectile):
+            if particle not in light_particles_latex:
+                raise ValueError(f"Unknown light particle '{particle}' in '{reaction}', expected one of {', '.join(light_particles_latex)}")
+        for nuclide in (target, recoil):
+            parse_nuclide(nuclide)
+        if mass_number(target) + mass_number(projectile) != mass_number(ejectile) + mass_number(recoil):
+            raise ValueError(f"Mass number is not conserved in '{reaction}'")
+
+        return cls(target, projectile, ejectile, recoil, tuple(float(level) for level in levels))
+
+    @property
+    def name(self) -> str:
+        return f"{self.target}({self.projectile},{self.ejectile}){self.recoil}"
+
+    @property
+    def tag(self) -> str:
+        # "13C(a,n)16O" -> "C13_a_n_O16", used for file names
+        def nuclide_tag(nuclide: str) -> str:
+            symbol, A = parse_nuclide(nuclide)
+            return f"{symbol}{A}"
+
+        return f"{nuclide_tag(self.target)}_{self.projectile}_{self.ejectile}_{nuclide_tag(self.recoil)}"
+
+    def latex(self, level: float | None = None) -> str:
+        target_symbol, target_A = parse_nuclide(self.target)
+        recoil_symbol, recoil_A = parse_nuclide(self.recoil)
+        projectile: str = light_particles_latex[self.projectile]
+        ejectile: str = light_particles_latex[self.ejectile]
+
+        result: str = f"$^{{{target_A}}}${target_symbol}$({projectile},{ejectile})^{{{recoil_A}}}${recoil_symbol}"
+        if level is not None:
+            result += level_latex(level)
+        return result
+
+    def recoil_latex(self, level: float) -> str:
+        recoil_symbol, recoil_A = parse_nuclide(self.recoil)
+        return f"$^{{{recoil_A}}}${recoil_symbol}{level_latex(level)}"
+
+    def masses(self, masses: NIST_isotope_mass) -> tuple[float, float, float, float]:
+        return (nuclide_mass(masses, self.projectile), nuclide_mass(masses, self.target), nuclide_mass(masses, self.ejectile), nuclide_mass(masses, self.recoil))
+
+    def mass_uncertainties(self, masses: NIST_isotope_mass) -> tuple[float, float, float, float]:
+        return (nuclide_mass_uncertainty(masses, self.projectile), nuclide_mass_uncertainty(masses, self.target),
+                nuclide_mass_uncertainty(masses, self.ejectile), nuclide_mass_uncertainty(masses, self.recoil))
+
+    def q_value(self, masses: NIST_isotope_mass, recoil_ex: float = 0.) -> float:
+        proj_mass, target_mass, eject_mass, recoil_mass = self.masses(masses)
+        return proj_mass + target_mass - eject_mass - recoil_mass - recoil_ex
+
+    def thresholds(self, masses: NIST_isotope_mass, angles: tuple[float, ...] = (0.,)) -> KinematicThresholds:
+        # Projectile energies of shape (level, angle)
+        levels: NDArray[np.float64] = np.asarray(self.levels, dtype=np.float64).reshape(-1, 1)
+        return kinematic_thresholds(np.asarray(angles, dtype=np.float64).reshape(1, -1), *self.masses(masses), levels)
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    reaction: Reaction
+    angles: tuple[float, ...] = (0.,)
+    source: str | None = None
+    branch: str = "plus"
+
+class StageResult(NamedTuple):
+    # energy and valid have shape (level, angle) + shape of the incoming energies,
+    # so a stage fed by another stage has shape (level, angle, source level, source angle, beam energy)
+    stage: Stage
+    beam_energy: NDArray[np.float64]
+    energy: NDArray[np.float64]
+    valid: NDArray[np.bool_]
+
+    def curve(self, index: tuple[int, ...]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        with span("curve", stage=self.stage.name, index=index):
+            valid: NDArray[np.bool_] = self.valid[index]
+            return (np.broadcast_to(self.beam_energy, valid.shape)[valid], self.energy[index][valid])
+
+class ReactionGraph:
+    def __init__(self, masses: NIST_isotope_mass, beam_energy: ArrayLike):
+        self._masses: NIST_isotope_mass = masses
+        self._beam_energy: NDArray[np.float64] = np.asarray(beam_energy, dtype=np.float64)
+        self._stages: dict[str, Stage] = {}
+        self._results: dict[str, StageResult] = {}
+
+    @property
+    def masses(self) -> NIST_isotope_mass:
+        return self._masses
+
+    @property
+    def beam_energy(self) -> NDArray[np.float64]:
+        return self._beam_energy
+
+    @property
+    def stages(self) -> dict[str, Stage]:
+        return self._stages
+
+    def add_stage(self, name: str, reaction: Reaction, angles: tuple[float, ...] = (0.,), source: str | None = None, branch: str = "plus") -> Stage:
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        if source is not None:
+            if source not in self._stages:
+                raise ValueError(f"Unknown source stage '{source}'")
+            if self._stages[source].reaction.ejectile != reaction.projectile:
+                raise ValueError(f"Stage '{source}' emits '{self._stages[source].reaction.ejectile}', but {reaction.name} needs '{reaction.projectile}'")
+        if branch not in ("plus", "minus"):
+            raise ValueError(f"Unknown branch '{branch}'")
+
+        stage: Stage = Stage(name, reaction, tuple(float(angle) for angle in angles), source, branch)
+        self._stages[name] = stage
+        return stage
+
+    def evaluate(self, name: str) -> StageResult:
+        if name in self._results:
+            return self._results[name]
+
+        stage: Stage = self._stages[name]
+        with span(f"evaluate {name}", reaction=stage.reaction.name, levels=stage.reaction.levels, angles=stage.angles):
+            result: StageResult = self._evaluate_stage(stage)
+        self._results[name] = result
+        return result
+
+    def _evaluate_stage(self, stage: Stage) -> StageResult:
+        if stage.source is None:
+            incoming: NDArray[np.float64] = self._beam_energy
+            incoming_valid: NDArray[np.bool_] = np.ones(incoming.shape, dtype=np.bool_)
+        else:
+            upstream: StageResult = self.evaluate(stage.source)
+            incoming = upstream.energy
+            incoming_valid = upstream.valid
+
+        expand: tuple[int, ...] = (1,) * incoming.ndim
+        levels: NDArray[np.float64] = np.asarray(stage.reaction.levels, dtype=np.float64).reshape((-1, 1) + expand)
+        angles: NDArray[np.float64] = np.asarray(stage.angles, dtype=np.float64).reshape((1, -1) + expand)
+        shape: tuple[int, ...] = (levels.shape[0], angles.shape[1]) + incoming.shape
+
+        proj_mass, target_mass, eject_mass, recoil_mass = stage.reaction.masses(self._masses)
+
+        with span("kinematics", points=int(np.prod(shape))):
+            if stage.reaction.ejectile == "g":
+                energy: NDArray[np.float64] = np.broadcast_to(gamma_energy(incoming, proj_mass, target_mass, recoil_mass, levels), shape)
+                valid: NDArray[np.bool_] = energy > 0
+            else:
+                kinematics: EjectKinematics = eject_kinematics(incoming, angles, proj_mass, target_mass, eject_mass, recoil_mass, levels)
+                energy, valid = (kinematics.plus, kinematics.plus_valid) if stage.branch == "plus" else (kinematics.minus, kinematics.minus_valid)
+
+        with span("mask"):
+            valid = valid & incoming_valid
+            energy = np.where(valid, energy, np.nan)
+
+        return StageResult(stage, self._beam_energy, energy, valid)
+
+    def evaluate_all(self) -> dict[str, StageResult]:
+        return {name: self.evaluate(name) for name in self._stages}
@@ -0,0 +1,148 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import instrumentation
+
+from numpy.typing import NDArray
+
+default_style: dict[str, dict] = {
+    "font": {"family": ["Helvetica", "Arial"]},
+    "text": {"usetex": True},
+    "axes": {"labelsize": 14, "titlesize": 14},
+    "xtick": {"labelsize": 14, "top": True, "direction": "in"},
+    "ytick": {"labelsize": 14, "right": True, "direction": "in"},
+    "legend": {"fontsize": 14},
+}
+
+@dataclass
+class CurveSpec:
+    x: NDArray[np.float64]
+    y: NDArray[np.float64]
+    linestyle: str = "-"
+    color: str = "black"
+    label: str | None = None
+    band: tuple[NDArray[np.float64], NDArray[np.float64]] | None = None # (lower, upper) drawn as a shaded region
+    weight: NDArray[np.float64] | None = None # relative intensity per point, drawn as a halo whose width follows it
+
+@dataclass
+class ImageSpec:
+    data: NDArray[np.float64] # (y, x)
+    extent: tuple[float, float, float, float] # (x min, x max, y min, y max)
+    colorbar_label: str
+    cmap: str = "viridis"
+    log: bool = False
+
+@dataclass
+class FigureSpec:
+    filename: str
+    title: str
+    xlabel: str
+    ylabel: str
+    curves: list[CurveSpec] = field(default_factory=list)
+    legend_outside: bool = False
+    image: ImageSpec | None = None
+    weight_linewidth: float = 8. # halo width of the largest weight in the figure
+    figsize: tuple[float, float] = (9, 7)
+    dpi: int = 400
+
+def setup_style(style: dict[str, dict]) -> None:
+    # Called once per process, matplotlib is only imported where figures are drawn
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    for group, settings in style.items():
+        plt.rc(group, **settings)
+
+def render_figure(spec: FigureSpec) -> str:
+    import matplotlib.pyplot as plt
+
+    with instrumentation.span(f"figure {os.path.basename(spec.filename)}", filename=spec.filename, curves=len(spec.curves)):
+        fig, ax = plt.subplots(1, 1, figsize=spec.figsize)
+        try:
+            with instrumentation.span("draw"):
+                ax.set_title(spec.title)
+                ax.set_ylabel(spec.ylabel)
+                ax.set_xlabel(spec.xlabel)
+                if spec.image is not None:
+                    draw_image(fig, ax, spec.image)
+                draw_weights(ax, spec)
+                for curve in spec.curves:
+                    ax.plot(curve.x, curve.y, linestyle=curve.linestyle, color=curve.color, label=curve.label)
+                    if curve.band is not None:
+                        ax.fill_between(curve.x, curve.band[0], curve.band[1], color=curve.color, alpha=0.3, linewidth=0)
+
+                if any(curve.label for curve in spec.curves):
+                    if spec.legend_outside:
+                        ax.legend(bbox_to_anchor=(1.04, 1), loc="upper left")
+                    else:
+                        ax.legend()
+
+            directory: str = os.path.dirname(spec.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with instrumentation.span("savefig", dpi=spec.dpi):
+                fig.savefig(spec.filename, bbox_inches="tight", dpi=spec.dpi)
+        finally:
+            plt.close(fig)
+
+    return spec.filename
+
+def draw_weights(ax, spec: FigureSpec) -> None:
+    from matplotlib.collections import LineCollection
+
+    # Widths are relative to the largest weight on the figure, points of unknown weight get no halo
+    weighted: list[CurveSpec] = [curve for curve in spec.curves if curve.weight is not None and curve.x.size > 1]
+    largest: float = max((float(np.nanmax(curve.weight, initial=0.)) for curve in weighted), default=0.)
+    if largest <= 0:
+        return
+
+    for curve in weighted:
+        segment_weight: NDArray[np.float64] = np.nan_to_num(0.5 * (curve.weight[:-1] + curve.weight[1:]), nan=0.)
+        segments: NDArray[np.float64] = np.stack([np.column_stack([curve.x[:-1], curve.y[:-1]]), np.column_stack([curve.x[1:], curve.y[1:]])], axis=1)
+        ax.add_collection(LineCollection(segments, linewidths=spec.weight_linewidth * segment_weight / largest, colors=curve.color,
+                                         alpha=0.3, capstyle="butt"), autolim=False)
+
+def draw_image(fig, ax, image: ImageSpec) -> None:
+    from matplotlib.colors import LogNorm
+
+    data: NDArray[np.float64] = np.ma.masked_less_equal(image.data, 0.) if image.log else image.data
+    mappable = ax.imshow(data, origin="lower", aspect="auto", extent=image.extent, cmap=image.cmap,
+                         norm=LogNorm() if image.log else None, interpolation="nearest", rasterized=True)
+    fig.colorbar(mappable, ax=ax, label=image.colorbar_label)
+
+def render_figures(specs: list[FigureSpec], style: dict[str, dict] = default_style, processes: int | None = None) -> list[str]:
+    if not specs:
+        return []
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(specs))
+
+    if processes <= 1:
+        setup_style(style)
+        return [render_figure(spec) for spec in specs]
+
+    if not instrumentation.is_enabled():
+        with ProcessPoolExecutor(max_workers=processes, initializer=setup_style, initargs=(style,)) as executor:
+            return list(executor.map(render_figure, specs))
+
+    # Spans recorded in the workers are sent back with each figure and nested under the caller's span
+    with ProcessPoolExecutor(max_workers=processes, initializer=_setup_traced_worker, initargs=(style, instrumentation.settings()[1])) as executor:
+        filenames: list[str] = []
+        for filename, events in executor.map(_render_figure_traced, specs):
+            filenames.append(filename)
+            instrumentation.add_events(events)
+        return filenames
+
+def _setup_traced_worker(style: dict[str, dict], track_memory: bool) -> None:
+    setup_style(style)
+    instrumentation.enable(track_memory)
+
+def _render_figure_traced(spec: FigureSpec) -> tuple[str, list[instrumentation.SpanEvent]]:
+    filename: str = render_figure(spec)
+    return (filename, instrumentation.collect())
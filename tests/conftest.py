@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from NIST_isotope_mass import NIST_isotope_mass
+
+@pytest.fixture(scope="session")
+def masses() -> NIST_isotope_mass:
+    return NIST_isotope_mass(os.path.join(root, "data", "nist_isotope_mass.txt"))
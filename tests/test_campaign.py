@@ -0,0 +1,19 @@
+from campaign import CampaignPoint, campaign_points, point_key
+from intensities import CrossSectionLibrary
+
+def test_point_key_follows_cross_section_tables(masses, tmp_path):
+    point: CampaignPoint = campaign_points(masses, {"energy_windows": [[4e3, 9e3]], "angle_sets": [[45.]], "sources": ["13C"], "detectors": ["79Br"]})[0]
+    table = tmp_path / "Br79_n_p_Se79.txt"
+
+    keys: list[str] = [point_key(masses, point), point_key(masses, point, CrossSectionLibrary(str(tmp_path)))]
+    table.write_text("1000 1\n9000 2\n")
+    keys.append(point_key(masses, point, CrossSectionLibrary(str(tmp_path))))
+    table.write_text("1000 1\n9000 3\n")
+    keys.append(point_key(masses, point, CrossSectionLibrary(str(tmp_path))))
+    assert len(set(keys)) == 4
+
+    # The same tables elsewhere give the same key
+    other = tmp_path / "copy"
+    other.mkdir()
+    (other / table.name).write_text(table.read_text())
+    assert point_key(masses, point, CrossSectionLibrary(str(other))) == keys[-1]
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from detector_response import DetectorResponse, bin_lines, fold_histogram, fold_lines
+
+from numpy.typing import NDArray
+
+def test_non_uniform_bin_edges_rejected():
+    edges: NDArray[np.float64] = np.geomspace(10., 10e3, 101)
+    with pytest.raises(ValueError):
+        bin_lines([1000.], [1.], edges)
+    with pytest.raises(ValueError):
+        fold_histogram(np.ones(100), edges, DetectorResponse())
+
+def test_line_folds_into_its_bin():
+    edges: NDArray[np.float64] = np.linspace(0., 2000., 401)
+    counts: NDArray[np.float64] = bin_lines([661.7], [1.], edges)
+    assert counts[132] == 1. and counts.sum() == 1.
+
+    folded: NDArray[np.float64] = fold_lines([661.7], [1.], edges, DetectorResponse())
+    centers: NDArray[np.float64] = 0.5 * (edges[1:] + edges[:-1])
+    assert abs(folded.sum() - 1.) < 1e-6
+    assert abs(np.sum(folded * centers) - 662.5) < 0.1
@@ -0,0 +1,35 @@
+import numpy as np
+
+from angular_spectra import AngularSpectra, angular_spectra
+from event_generator import EventModel, EventSpectra, channel_model, generate_spectra
+from kinematics import EjectKinematics, eject_kinematics, eject_lab_from_cm
+from reactions import Reaction
+
+from numpy.typing import NDArray
+
+def test_cm_sampling_lands_on_a_physical_root(masses):
+    reaction: Reaction = Reaction("13C", "a", "n", "16O", (6130.,))
+    cos_cm: NDArray[np.float64] = np.linspace(-1., 1., 201)
+    energy, lab_angle, valid = eject_lab_from_cm(5200., cos_cm, *reaction.masses(masses), 6130.)
+    kinematics: EjectKinematics = eject_kinematics(5200., lab_angle, *reaction.masses(masses), 6130.)
+
+    assert valid.all()
+    assert (lab_angle < 90.).all()
+    matched: NDArray[np.float64] = np.where(np.isclose(energy, kinematics.plus, rtol=1e-9), kinematics.plus, kinematics.minus)
+    np.testing.assert_allclose(energy, matched, rtol=1e-9)
+    assert (kinematics.minus_valid & ~np.isclose(energy, kinematics.plus, rtol=1e-9)).any()
+
+def test_neutron_spectrum_matches_angular_spectra(masses):
+    # A monoenergetic 5 MeV beam over all lab angles gives the flat box of an isotropic CM distribution
+    reaction: Reaction = Reaction("13C", "a", "n", "16O")
+    model: EventModel = EventModel(channel_model(masses, reaction, (0., 180.)), (), (5000., 5000.), (4000., 7500.), 35)
+    spectra: EventSpectra = generate_spectra(model, 400_000, chunk_size=100_000)
+    generated: NDArray[np.float64] = spectra.counts["neutron"] / spectra.n_events
+
+    expected: AngularSpectra = angular_spectra(masses, reaction, [5000.], np.linspace(0., 180., 3601), model.bin_edges)
+    centres: NDArray[np.float64] = 0.5 * (model.bin_edges[1:] + model.bin_edges[:-1])
+
+    assert abs(generated.sum() - 1.) < 1e-12
+    assert abs(np.sum(generated * centres) - np.sum(expected.spectra[0, 0] * centres)) < 3.
+    box: NDArray[np.bool_] = expected.spectra[0, 0] > 0.9 * expected.spectra[0, 0].max()
+    np.testing.assert_allclose(generated[box], expected.spectra[0, 0][box], rtol=0.05)
@@ -0,0 +1,58 @@
+import numpy as np
+
+from kinematics import EjectKinematics, eject_kinematics, kinematic_thresholds
+from reactions import Reaction
+
+from numpy.typing import NDArray
+
+C13_a_n = Reaction("13C", "a", "n", "16O")
+
+def test_backward_root_below_90_deg_threshold_is_not_physical(masses):
+    # At 135 deg the plus root solves the squared equation from 5169.7 keV on, but until the 90 deg
+    # threshold at 5220.9 keV its lab velocity points forward
+    lab_energy: NDArray[np.float64] = np.linspace(5170., 5220., 1000)
+    kinematics: EjectKinematics = eject_kinematics(lab_energy, 135., *C13_a_n.masses(masses), 6130.)
+
+    assert not kinematics.plus_valid.any()
+    assert not kinematics.minus_valid.any()
+    assert np.isnan(kinematics.plus).all()
+
+    above: EjectKinematics = eject_kinematics(np.linspace(5222., 6000., 100), 135., *C13_a_n.masses(masses), 6130.)
+    assert above.plus_valid.all()
+    assert not above.minus_valid.any()
+
+def test_minus_root_never_physical_for_positive_q_value(masses):
+    kinematics: EjectKinematics = eject_kinematics(np.linspace(1., 10e3, 1000).reshape(1, -1), np.linspace(0., 180., 37).reshape(-1, 1), *C13_a_n.masses(masses), 0.)
+
+    assert kinematics.plus_valid.all()
+    assert not kinematics.minus_valid.any()
+
+def test_roots_conserve_momentum(masses):
+    # Both physical roots of the endothermic 6130 keV channel at 10 deg, checked against momentum balance
+    proj_mass, target_mass, eject_mass, recoil_mass = C13_a_n.masses(masses)
+    lab_energy: NDArray[np.float64] = np.linspace(4000., 6000., 200)
+    angle: float = np.deg2rad(10.)
+    kinematics: EjectKinematics = eject_kinematics(lab_energy, 10., proj_mass, target_mass, eject_mass, recoil_mass, 6130.)
+    assert kinematics.minus_valid.any()
+
+    for energy, valid in ((kinematics.plus, kinematics.plus_valid), (kinematics.minus, kinematics.minus_valid)):
+        p_beam: NDArray[np.float64] = np.sqrt(2. * proj_mass * lab_energy[valid])
+        p_eject: NDArray[np.float64] = np.sqrt(2. * eject_mass * energy[valid])
+        recoil_energy: NDArray[np.float64] = (p_beam**2 + p_eject**2 - 2. * p_beam * p_eject * np.cos(angle)) / (2. * recoil_mass)
+        q_value: float = C13_a_n.q_value(masses, 6130.)
+        np.testing.assert_allclose(energy[valid] + recoil_energy, lab_energy[valid] + q_value, rtol=1e-9)
+
+def test_thresholds_match_physical_roots(masses):
+    # The closed-form edges against a dense scan of the plus mask, forward, at and behind 90 deg
+    lab_energy: NDArray[np.float64] = np.linspace(1., 12e3, 200_001)
+    spacing: float = lab_energy[1] - lab_energy[0]
+    for reaction, level in ((C13_a_n, 6130.), (C13_a_n, 0.), (Reaction("79Br", "n", "p", "79Se"), 0.), (Reaction("12C", "a", "n", "15O"), 0.)):
+        for angle in (0., 45., 90., 135., 180.):
+            thresholds = kinematic_thresholds(angle, *reaction.masses(masses), level)
+            kinematics: EjectKinematics = eject_kinematics(lab_energy, angle, *reaction.masses(masses), level)
+            opens: float = lab_energy[np.argmax(kinematics.plus_valid)] if kinematics.plus_valid.any() else np.inf
+            assert abs(opens - max(float(thresholds.lower), lab_energy[0])) <= spacing, (reaction.name, level, angle)
+
+def test_backward_threshold_is_the_90_deg_threshold(masses):
+    thresholds = kinematic_thresholds(np.array([90., 135., 180.]), *C13_a_n.masses(masses), 6130.)
+    np.testing.assert_allclose(thresholds.lower, 5220.868, atol=1e-3)
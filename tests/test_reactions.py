@@ -0,0 +1,25 @@
+import numpy as np
+
+from reactions import Reaction, ReactionGraph, StageResult
+
+def test_minus_branch_closed_where_not_physical(masses):
+    # For Q > 0 the minus root is never a physical solution, at any angle
+    graph: ReactionGraph = ReactionGraph(masses, [3000., 4000., 6000.])
+    graph.add_stage("source", Reaction("13C", "a", "n", "16O"), (45., 135.), branch="minus")
+    result: StageResult = graph.evaluate("source")
+
+    assert not result.valid.any()
+    assert np.isnan(result.energy).all()
+
+def test_minus_branch_of_endothermic_channel(masses):
+    # 16O(6130) at 10 deg is double-valued between its threshold at this angle and the 90 deg one at 5220.9 keV
+    graph: ReactionGraph = ReactionGraph(masses, [5150., 5200., 5300.])
+    reaction: Reaction = Reaction("13C", "a", "n", "16O", (6130.,))
+    graph.add_stage("plus", reaction, (10.,))
+    graph.add_stage("minus", reaction, (10.,), branch="minus")
+    plus: StageResult = graph.evaluate("plus")
+    minus: StageResult = graph.evaluate("minus")
+
+    np.testing.assert_array_equal(minus.valid[0, 0], [True, True, False])
+    assert plus.valid.all()
+    assert (minus.energy[minus.valid] < plus.energy[minus.valid]).all()
@@ -0,0 +1,32 @@
+import numpy as np
+
+from reactions import Reaction
+from thick_target import EnergyLossTable, ThickTargetSpectrum, thick_target_spectrum
+
+from numpy.typing import NDArray
+
+def test_yield_per_steradian_integrates_to_total(masses):
+    # With S = 1 keV per depth unit and sigma = 1 the total yield is the energy lost above the 0 deg threshold.
+    # Angles at the centres of equal cos(theta) cells, so the sum over angles is the integral over 4 pi.
+    table: EnergyLossTable = EnergyLossTable([100., 20e3], [1., 1.])
+    reaction: Reaction = Reaction("13C", "a", "n", "16O", (0., 6130.))
+    n_angles: int = 400
+    angles: NDArray[np.float64] = np.rad2deg(np.arccos(1. - (np.arange(n_angles) + 0.5) * 2. / n_angles))
+
+    spectrum: ThickTargetSpectrum = thick_target_spectrum(masses, reaction, table, [6000., 8000.], tuple(angles), np.linspace(0., 15e3, 1501), n_steps=512)
+    total: NDArray[np.float64] = spectrum.yields.sum(axis=1) * 4. * np.pi / n_angles
+    opens: float = float(reaction.thresholds(masses, (0.,)).lower[1, 0])
+
+    np.testing.assert_allclose(total[0], [6000. - 100., 8000. - 100.], rtol=1e-4)
+    np.testing.assert_allclose(total[1], [6000. - opens, 8000. - opens], rtol=1e-2)
+    np.testing.assert_allclose(spectrum.counts.sum(axis=-1), spectrum.yields, rtol=1e-12)
+
+def test_double_valued_region_not_counted_twice(masses):
+    # Forward of 90 deg both branches of 16O(6130) are binned; with their Jacobians the yield per steradian
+    # still falls off smoothly with angle instead of jumping by the double-valued width
+    table: EnergyLossTable = EnergyLossTable([100., 20e3], [1., 1.])
+    reaction: Reaction = Reaction("13C", "a", "n", "16O", (6130.,))
+    spectrum: ThickTargetSpectrum = thick_target_spectrum(masses, reaction, table, [6000.], (45., 90., 135.), np.linspace(0., 15e3, 1501), n_steps=2048)
+    yields: NDArray[np.float64] = spectrum.yields[0, :, 0]
+
+    assert yields[0] > yields[1] > yields[2] > 0
@@ -0,0 +1,128 @@
+import argparse
+
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from NIST_isotope_mass import NIST_isotope_mass
+from kinematics import EjectKinematics, branch_jacobians, eject_kinematics
+from reactions import Reaction
+
+from numpy.typing import ArrayLike, NDArray
+
+class ThickTargetSpectrum(NamedTuple):
+    reaction: Reaction
+    angles: tuple[float, ...]
+    beam_energy: NDArray[np.float64]
+    bin_edges: NDArray[np.float64]
+    counts: NDArray[np.float64] # (level, angle, beam energy, bin), yield per steradian per bin
+    yields: NDArray[np.float64] # (level, angle, beam energy), yield per steradian summed over the physical branches
+
+def load_stopping_power(filename: str) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    # Two whitespace separated columns, projectile energy [keV] and stopping power [keV per depth unit],
+    # "#" starts a comment. Any depth unit (um, ug/cm^2, 1e15 atoms/cm^2) works, it carries over to the yields.
+    table: NDArray[np.float64] = np.loadtxt(filename, comments="#", ndmin=2)
+    if table.shape[1] < 2:
+        raise ValueError(f"{filename} needs two columns, energy and stopping power")
+
+    energy: NDArray[np.float64] = table[:, 0]
+    stopping_power: NDArray[np.float64] = table[:, 1]
+    if np.any(np.diff(energy) <= 0):
+        raise ValueError(f"Energies in {filename} must be strictly increasing")
+    if np.any(stopping_power <= 0):
+        raise ValueError(f"Stopping powers in {filename} must be positive")
+    return (energy, stopping_power)
+
+class EnergyLossTable:
+    # Cumulative depth needed to slow down from energy E to the lowest tabulated energy, R(E) = int dE / S(E).
+    # Built once on a fine logarithmic grid with S interpolated log-log; E(x) is the inverse lookup.
+    def __init__(self, energy: ArrayLike, stopping_power: ArrayLike, n_grid: int = 4096):
+        energy = np.asarray(energy, dtype=np.float64)
+        stopping_power = np.asarray(stopping_power, dtype=np.float64)
+        if energy[0] <= 0:
+            raise ValueError("The stopping power table must start above 0 keV")
+
+        self._energy: NDArray[np.float64] = np.geomspace(energy[0], energy[-1], n_grid)
+        inverse_stopping: NDArray[np.float64] = np.exp(-np.interp(np.log(self._energy), np.log(energy), np.log(stopping_power)))
+        self._depth: NDArray[np.float64] = np.concatenate([[0.], np.cumsum(0.5 * (inverse_stopping[1:] + inverse_stopping[:-1]) * np.diff(self._energy))])
+
+    @classmethod
+    def from_file(cls, filename: str) -> "EnergyLossTable":
+        return cls(*load_stopping_power(filename))
+
+    @property
+    def energy_range(self) -> tuple[float, float]:
+        return (float(self._energy[0]), float(self._energy[-1]))
+
+    def depth(self, energy: ArrayLike) -> NDArray[np.float64]:
+        energy = np.asarray(energy, dtype=np.float64)
+        if np.any(energy > self._energy[-1]):
+            raise ValueError(f"Energies above {self._energy[-1]:g} keV are outside the stopping power table")
+        return np.interp(energy, self._energy, self._depth)
+
+    def energy(self, depth: ArrayLike) -> NDArray[np.float64]:
+        return np.interp(depth, self._depth, self._energy)
+
+def slowing_down(table: EnergyLossTable, beam_energy: ArrayLike, stop_energy: float, n_steps: int) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    # Projectile energies at the midpoints of n_steps equal depth steps from the surface down to
+    # stop_energy, and the step lengths; shapes (beam energy, step) and (beam energy, 1)
+    beam_energy = np.asarray(beam_energy, dtype=np.float64).reshape(-1, 1)
+    surface: NDArray[np.float64] = table.depth(beam_energy)
+    end: NDArray[np.float64] = table.depth(np.minimum(max(stop_energy, table.energy_range[0]), beam_energy))
+
+    step: NDArray[np.float64] = (surface - end) / n_steps
+    midpoints: NDArray[np.float64] = surface - (np.arange(n_steps) + 0.5) * step
+    return (table.energy(midpoints), step)
+
+def thick_target_spectrum(masses: NIST_isotope_mass, reaction: Reaction, table: EnergyLossTable, beam_energy: ArrayLike, angles: tuple[float, ...],
+                          bin_edges: NDArray[np.float64], cross_section: Callable[[NDArray[np.float64]], NDArray[np.float64]] | None = None,
+                          n_steps: int = 256) -> ThickTargetSpectrum:
+    # Yield of a target thick enough to stop the beam: Y = int sigma(E(x)) dx over the depth x.
+    # Depth is one extra array axis, the ejectile energy is evaluated on (level, angle, beam energy, step)
+    # and histogrammed in a single bincount. For an isotropic CM distribution each physical branch at the
+    # detector angle carries sigma * dx / (4 pi) * dOmega_CM / dOmega_lab per lab steradian.
+    beam_energy = np.atleast_1d(np.asarray(beam_energy, dtype=np.float64))
+    stop_energy: float = float(np.nanmin(reaction.thresholds(masses, angles).lower))
+    energy, step = slowing_down(table, beam_energy, stop_energy, n_steps)
+
+    step_weights: NDArray[np.float64] = np.broadcast_to(step, energy.shape) if cross_section is None else cross_section(energy) * step
+
+    levels: NDArray[np.float64] = np.asarray(reaction.levels, dtype=np.float64).reshape(-1, 1, 1, 1)
+    lab_angles: NDArray[np.float64] = np.asarray(angles, dtype=np.float64).reshape(1, -1, 1, 1)
+    proj_mass, target_mass, eject_mass, recoil_mass = reaction.masses(masses)
+    kinematics: EjectKinematics = eject_kinematics(energy, lab_angles, proj_mass, target_mass, eject_mass, recoil_mass, levels)
+    shape: tuple[int, ...] = kinematics.plus.shape
+
+    n_bins: int = bin_edges.size - 1
+    # One flat index over (level, angle, beam energy, bin)
+    curves: NDArray[np.intp] = np.arange(np.prod(shape[:-1])).reshape(shape[:-1] + (1,))
+    counts: NDArray[np.float64] = np.zeros(curves.size * n_bins)
+    yields: NDArray[np.float64] = np.zeros(shape[:-1])
+
+    for branch in branch_jacobians(kinematics, energy, lab_angles, proj_mass, eject_mass, recoil_mass):
+        weights: NDArray[np.float64] = np.where(branch.valid, step_weights * branch.jacobian / (4. * np.pi), 0.)
+        bins: NDArray[np.intp] = np.searchsorted(bin_edges, np.where(branch.valid, branch.energy, -np.inf), side="right") - 1
+        inside: NDArray[np.bool_] = branch.valid & (bins >= 0) & (bins < n_bins)
+
+        counts += np.bincount((curves * n_bins + bins)[inside], weights=weights[inside], minlength=counts.size)
+        yields += weights.sum(axis=-1)
+
+    return ThickTargetSpectrum(reaction, tuple(angles), beam_energy, bin_edges, counts.reshape(shape[:-1] + (n_bins,)), yields)
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Neutron spectra of a thick 13C target, integrated over the slowing-down of the alpha beam")
+    parser.add_argument("stopping_power", help="two-column file: alpha energy [keV], stopping power in carbon [keV per depth unit]")
+    parser.add_argument("--beam-energy", type=float, nargs="+", default=[5e3, 6e3, 7e3, 8e3], help="[keV]")
+    parser.add_argument("--angles", type=float, nargs="+", default=[45., 90., 135.], help="[deg]")
+    parser.add_argument("--bins", type=float, nargs=3, default=(0., 15e3, 1500), metavar=("MIN", "MAX", "N"), help="neutron energy bins [keV]")
+    parser.add_argument("--steps", type=int, default=256, help="depth steps")
+    parser.add_argument("--output", default="thick_target.npz")
+    parser.add_argument("--masses", default="data/nist_isotope_mass.txt")
+    args: argparse.Namespace = parser.parse_args()
+
+    reaction: Reaction = Reaction("13C", "a", "n", "16O", (0., 6130., 6917., 7117.))
+    spectrum: ThickTargetSpectrum = thick_target_spectrum(NIST_isotope_mass(args.masses), reaction, EnergyLossTable.from_file(args.stopping_power),
+                                                          args.beam_energy, tuple(args.angles), np.linspace(args.bins[0], args.bins[1], int(args.bins[2]) + 1),
+                                                          n_steps=args.steps)
+    np.savez(args.output, levels=np.asarray(reaction.levels), angles=np.asarray(spectrum.angles), beam_energy=spectrum.beam_energy,
+             bin_edges=spectrum.bin_edges, counts=spectrum.counts, yields=spectrum.yields)
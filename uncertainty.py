@@ -0,0 +1,193 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from kinematics import eject_kinematics, gamma_energy
+from reactions import ReactionGraph, Stage, StageResult, nuclide_mass, nuclide_mass_uncertainty
+
+from numpy.typing import ArrayLike, NDArray
+
+class CurveUncertainty(NamedTuple):
+    energy: NDArray[np.float64] # nominal energy, shape of the stage result
+    sigma: NDArray[np.float64]  # 1 sigma from the mass uncertainties, NaN where the energy is and at kinematic thresholds
+
+    @property
+    def lower(self) -> NDArray[np.float64]:
+        return self.energy - self.sigma
+
+    @property
+    def upper(self) -> NDArray[np.float64]:
+        return self.energy + self.sigma
+
+    def band(self, index: tuple[int, ...], n_sigma: float = 1.) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        # Masked like StageResult.curve, so the band lines up with the curve points
+        energy: NDArray[np.float64] = self.energy[index]
+        sigma: NDArray[np.float64] = n_sigma * self.sigma[index]
+        open_points: NDArray[np.bool_] = ~np.isnan(energy)
+        return ((energy - sigma)[open_points], (energy + sigma)[open_points])
+
+class EnergyGradient(NamedTuple):
+    energy: NDArray[np.float64]
+    # Derivatives with respect to the incoming energy and the projectile, target, ejectile and recoil masses
+    incoming: NDArray[np.float64]
+    masses: tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]
+
+def eject_energy_gradient(lab_energy: ArrayLike, lab_angle: ArrayLike, proj_mass: float, target_mass: float, eject_mass: float, recoil_mass: float, recoil_ex: ArrayLike, branch: str = "plus") -> EnergyGradient:
+    # E = (root / (M + m_e))^2 with root = u +- sqrt(D), u = sqrt(m_p m_e E_in) cos(theta) and
+    # D = m_p m_e cos^2(theta) E_in + (M + m_e) (M Q + (M - m_p) E_in), the same discriminant as eject_kinematics
+    lab_energy = np.asarray(lab_energy, dtype=np.float64)
+    cos_angle: NDArray[np.float64] = np.cos(np.deg2rad(np.asarray(lab_angle, dtype=np.float64)))
+    q_value: NDArray[np.float64] = proj_mass + target_mass - eject_mass - recoil_mass - np.asarray(recoil_ex, dtype=np.float64)
+    sign: float = 1. if branch == "plus" else -1.
+    M: float = recoil_mass
+    total: float = recoil_mass + eject_mass
+
+    kinematics = eject_kinematics(lab_energy, lab_angle, proj_mass, target_mass, eject_mass, recoil_mass, recoil_ex)
+    energy: NDArray[np.float64] = kinematics.plus if branch == "plus" else kinematics.minus
+
+    u: NDArray[np.float64] = np.sqrt(proj_mass * eject_mass * lab_energy) * cos_angle
+    linear: NDArray[np.float64] = M * q_value + (M - proj_mass) * lab_energy
+    discriminant: NDArray[np.float64] = proj_mass * eject_mass * cos_angle**2 * lab_energy + total * linear
+    sqrt_discriminant: NDArray[np.float64] = np.sqrt(np.where(kinematics.valid, discriminant, np.nan))
+    root: NDArray[np.float64] = u + sign * sqrt_discriminant
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u_over_2: NDArray[np.float64] = 0.5 * u
+        d_root_d_energy: NDArray[np.float64] = u_over_2 / lab_energy + sign * 0.5 * (proj_mass * eject_mass * cos_angle**2 + total * (M - proj_mass)) / sqrt_discriminant
+        d_root_d_proj: NDArray[np.float64] = u_over_2 / proj_mass + sign * 0.5 * (eject_mass * cos_angle**2 * lab_energy + total * (M - lab_energy)) / sqrt_discriminant
+        d_root_d_target: NDArray[np.float64] = sign * 0.5 * total * M / sqrt_discriminant
+        d_root_d_eject: NDArray[np.float64] = u_over_2 / eject_mass + sign * 0.5 * (proj_mass * cos_angle**2 * lab_energy + linear - total * M) / sqrt_discriminant
+        d_root_d_recoil: NDArray[np.float64] = sign * 0.5 * (linear + total * (q_value - M + lab_energy)) / sqrt_discriminant
+
+    # dE/dx = 2 root / (M + m_e)^2 droot/dx - 2 root^2 / (M + m_e)^3 d(M + m_e)/dx
+    scale: NDArray[np.float64] = 2. * root / total**2
+    total_term: NDArray[np.float64] = 2. * root**2 / total**3
+    return EnergyGradient(energy, scale * d_root_d_energy,
+                          (scale * d_root_d_proj, scale * d_root_d_target, scale * d_root_d_eject - total_term, scale * d_root_d_recoil - total_term))
+
+def gamma_energy_gradient(lab_energy: ArrayLike, proj_mass: float, target_mass: float, recoil_mass: float, recoil_ex: ArrayLike) -> EnergyGradient:
+    # E = E_in + Q - m_p E_in / (M + E_x)
+    lab_energy = np.asarray(lab_energy, dtype=np.float64)
+    recoil_total: NDArray[np.float64] = recoil_mass + np.asarray(recoil_ex, dtype=np.float64)
+    energy: NDArray[np.float64] = gamma_energy(lab_energy, proj_mass, target_mass, recoil_mass, recoil_ex)
+    zero: NDArray[np.float64] = np.zeros(np.broadcast_shapes(energy.shape, recoil_total.shape))
+
+    return EnergyGradient(energy, 1. - proj_mass / recoil_total + zero,
+                          (1. - lab_energy / recoil_total + zero, 1. + zero, zero, -1. + proj_mass * lab_energy / recoil_total**2 + zero))
+
+def _stage_gradients(graph: ReactionGraph, name: str, cache: dict[str, dict[str, NDArray[np.float64]]]) -> dict[str, NDArray[np.float64]]:
+    # Derivatives of the stage energy with respect to the mass of every nuclide in its chain. A nuclide that
+    # appears in several stages (the neutron of a source feeding a detector) collects all its terms, so the
+    # correlation between stages is kept.
+    if name in cache:
+        return cache[name]
+
+    stage: Stage = graph.stages[name]
+    result: StageResult = graph.evaluate(name)
+
+    if stage.source is None:
+        incoming: NDArray[np.float64] = graph.beam_energy
+        upstream: dict[str, NDArray[np.float64]] = {}
+    else:
+        incoming = graph.evaluate(stage.source).energy
+        upstream = _stage_gradients(graph, stage.source, cache)
+
+    expand: tuple[int, ...] = (1,) * incoming.ndim
+    levels: NDArray[np.float64] = np.asarray(stage.reaction.levels, dtype=np.float64).reshape((-1, 1) + expand)
+    angles: NDArray[np.float64] = np.asarray(stage.angles, dtype=np.float64).reshape((1, -1) + expand)
+    reaction_masses: tuple[float, float, float, float] = stage.reaction.masses(graph.masses)
+
+    if stage.reaction.ejectile == "g":
+        gradient: EnergyGradient = gamma_energy_gradient(incoming, reaction_masses[0], reaction_masses[1], reaction_masses[3], levels)
+    else:
+        gradient = eject_energy_gradient(incoming, angles, *reaction_masses, levels, stage.branch)
+
+    gradients: dict[str, NDArray[np.float64]] = {nuclide: gradient.incoming * d_incoming for nuclide, d_incoming in upstream.items()}
+    nuclides: tuple[str, str, str, str] = (stage.reaction.projectile, stage.reaction.target, stage.reaction.ejectile, stage.reaction.recoil)
+    for nuclide, d_mass in zip(nuclides, gradient.masses):
+        if nuclide == "g":
+            continue
+        gradients[nuclide] = gradients[nuclide] + d_mass if nuclide in gradients else d_mass
+
+    gradients = {nuclide: np.where(result.valid, np.broadcast_to(d_mass, result.energy.shape), np.nan) for nuclide, d_mass in gradients.items()}
+    cache[name] = gradients
+    return gradients
+
+def _propagate(graph: ReactionGraph, name: str, gradients: dict[str, NDArray[np.float64]]) -> CurveUncertainty:
+    result: StageResult = graph.evaluate(name)
+    variance: NDArray[np.float64] = np.zeros(result.energy.shape)
+    for nuclide, gradient in gradients.items():
+        variance += np.square(gradient * nuclide_mass_uncertainty(graph.masses, nuclide))
+    sigma: NDArray[np.float64] = np.sqrt(variance)
+
+    # A band reaching below zero energy means the point lies within the mass uncertainty of a kinematic
+    # threshold, where dE/dm diverges and first-order propagation does not hold; such points get no band
+    return CurveUncertainty(result.energy, np.where(sigma > np.abs(result.energy), np.nan, sigma))
+
+def stage_uncertainty(graph: ReactionGraph, name: str) -> CurveUncertainty:
+    # Linear propagation of the (uncorrelated) tabulated mass uncertainties through analytic derivatives,
+    # a constant number of array operations per stage independent of the grid size
+    return _propagate(graph, name, _stage_gradients(graph, name, {}))
+
+def graph_uncertainties(graph: ReactionGraph) -> dict[str, CurveUncertainty]:
+    # Upstream gradients are shared between the stages fed from them
+    cache: dict[str, dict[str, NDArray[np.float64]]] = {}
+    return {name: _propagate(graph, name, _stage_gradients(graph, name, cache)) for name in graph.stages}
+
+def _sampled_stage_energy(graph: ReactionGraph, name: str, sampled_masses: dict[str, NDArray[np.float64]]) -> NDArray[np.float64]:
+    # Same evaluation as ReactionGraph, with a leading sample axis on the masses and on every energy
+    stage: Stage = graph.stages[name]
+    if stage.source is None:
+        incoming: NDArray[np.float64] = graph.beam_energy[np.newaxis]
+    else:
+        incoming = _sampled_stage_energy(graph, stage.source, sampled_masses)
+
+    expand: tuple[int, ...] = (1,) * (incoming.ndim - 1)
+    levels: NDArray[np.float64] = np.asarray(stage.reaction.levels, dtype=np.float64).reshape((1, -1, 1) + expand)
+    angles: NDArray[np.float64] = np.asarray(stage.angles, dtype=np.float64).reshape((1, 1, -1) + expand)
+    incoming = incoming[:, np.newaxis, np.newaxis]
+
+    def mass(nuclide: str) -> NDArray[np.float64] | float:
+        if nuclide == "g":
+            return 0.
+        return sampled_masses[nuclide].reshape((-1, 1, 1) + expand)
+
+    if stage.reaction.ejectile == "g":
+        energy: NDArray[np.float64] = gamma_energy(incoming, mass(stage.reaction.projectile), mass(stage.reaction.target), mass(stage.reaction.recoil), levels)
+        return np.where(energy > 0, energy, np.nan)
+
+    kinematics = eject_kinematics(incoming, angles, mass(stage.reaction.projectile), mass(stage.reaction.target), mass(stage.reaction.ejectile), mass(stage.reaction.recoil), levels)
+    energy, valid = (kinematics.plus, kinematics.plus_valid) if stage.branch == "plus" else (kinematics.minus, kinematics.minus_valid)
+    return np.where(valid & ~np.isnan(incoming), energy, np.nan)
+
+def stage_uncertainty_mc(graph: ReactionGraph, name: str, n_samples: int = 10_000, chunk_size: int = 256, seed: int = 0) -> CurveUncertainty:
+    # Streaming Monte Carlo over the masses, only running sums of one chunk of samples are kept in memory.
+    # Deviations are accumulated relative to the nominal energy to avoid cancellation.
+    result: StageResult = graph.evaluate(name)
+    nuclides: set[str] = set()
+    stage: Stage | None = graph.stages[name]
+    while stage is not None:
+        nuclides.update(n for n in (stage.reaction.projectile, stage.reaction.target, stage.reaction.ejectile, stage.reaction.recoil) if n != "g")
+        stage = graph.stages[stage.source] if stage.source is not None else None
+    nominal: dict[str, float] = {nuclide: nuclide_mass(graph.masses, nuclide) for nuclide in sorted(nuclides)}
+    sigma: dict[str, float] = {nuclide: nuclide_mass_uncertainty(graph.masses, nuclide) for nuclide in nominal}
+
+    rng: np.random.Generator = np.random.default_rng(seed)
+    count: NDArray[np.int64] = np.zeros(result.energy.shape, dtype=np.int64)
+    total: NDArray[np.float64] = np.zeros(result.energy.shape)
+    total_squares: NDArray[np.float64] = np.zeros(result.energy.shape)
+
+    for start in range(0, n_samples, chunk_size):
+        n: int = min(chunk_size, n_samples - start)
+        sampled: dict[str, NDArray[np.float64]] = {nuclide: rng.normal(nominal[nuclide], sigma[nuclide], n) for nuclide in nominal}
+        deviation: NDArray[np.float64] = _sampled_stage_energy(graph, name, sampled) - result.energy
+        finite: NDArray[np.bool_] = np.isfinite(deviation)
+        deviation = np.where(finite, deviation, 0.)
+        count += finite.sum(axis=0)
+        total += deviation.sum(axis=0)
+        total_squares += np.square(deviation).sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean: NDArray[np.float64] = total / count
+        variance: NDArray[np.float64] = np.maximum(total_squares / count - mean**2, 0.) * count / (count - 1)
+    return CurveUncertainty(result.energy, np.where(result.valid & (count > 1), np.sqrt(variance), np.nan))